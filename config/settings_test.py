@@ -0,0 +1,21 @@
+"""
+Settings for running the test suite.
+"""
+from .settings import *  # noqa: F401,F403
+
+# Always test against an in-memory SQLite database, even where the
+# environment points at PostgreSQL (e.g. in Docker), so tests don't pay
+# for network round trips to a database server
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    }
+}
+
+# PBKDF2 dominates user creation in tests
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+# Run Celery tasks inline, so tests exercise the real task path without a broker
+CELERY_TASK_ALWAYS_EAGER = True
+CELERY_TASK_EAGER_PROPAGATES = True
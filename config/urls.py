@@ -21,6 +21,12 @@ urlpatterns += [
     path('api/', include('rest_framework.urls')),
 ]
 
+# Profiling URLs
+if settings.ENABLE_SILK:
+    urlpatterns += [
+        path('silk/', include('silk.urls', namespace='silk')),
+    ]
+
 # Static and Media URLs
 urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 
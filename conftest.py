@@ -1,15 +1,38 @@
 import pytest
 from io import BytesIO
+from unittest.mock import patch
 from reportlab.pdfgen import canvas
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
 from rest_framework.test import APIClient
 from rest_framework.authtoken.models import Token
-from PIL import Image
 
 
 User = get_user_model()
 
+# Minimal valid PNG (1x1 white pixel), so tests don't pay for a PIL encode.
+# The tEXt chunk pads it past the 100-byte minimum upload size.
+PNG_1X1_WHITE = (
+    b'\x89PNG\r\n\x1a\n'
+    b'\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x02\x00\x00\x00\x90wS\xde'
+    b'\x00\x00\x00\x1etEXtComment\x00Auto-Doc-AI test image4Q\xd4^'
+    b'\x00\x00\x00\x0cIDATx\x9cc\xf8\xff\xff?\x00\x05\xfe\x02\xfe\r\xefF\xb8'
+    b'\x00\x00\x00\x00IEND\xaeB`\x82'
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """
+    Fixture giving every test an empty cache.
+
+    Per-user keys (list counts, cached results, throttles) would otherwise
+    leak between tests, since the module user keeps the same id.
+    """
+    cache.clear()
+
 
 @pytest.fixture
 def api_client():
@@ -19,28 +42,81 @@ def api_client():
     return APIClient()
 
 
+@pytest.fixture(scope="module")
+def module_user(django_db_setup, django_db_blocker):
+    """
+    Fixture for a test user created once per test module.
+
+    The row is inserted outside the per-test transactions, so it survives
+    their rollbacks and is deleted when the module finishes.
+    """
+    with django_db_blocker.unblock():
+        user = User.objects.create_user(
+            email="testuser@example.com",
+            password="TestPass123!",
+            first_name="Test",
+            last_name="User",
+            is_active=True,
+            is_verified=True
+        )
+    yield user
+    with django_db_blocker.unblock():
+        user.delete()
+
+
+@pytest.fixture
+def user(db, module_user):
+    """
+    Fixture for the test user.
+
+    Refetched per test, so changes a test makes to the instance (e.g.
+    last_login, cached relations) don't carry over to the next one.
+    """
+    return User.objects.get(pk=module_user.pk)
+
+
 @pytest.fixture
-def user(db):
+def other_user(db):
     """
-    Fixture for creating a test user.
+    Fixture for a second user, for testing access to another user's data.
     """
-    user = User.objects.create_user(
-        email="testuser@example.com",
-        password="TestPass123!",
-        first_name="Test",
+    return User.objects.create_user(
+        email="other@example.com",
+        password="OtherPass123!",
+        first_name="Other",
         last_name="User",
         is_active=True,
         is_verified=True
     )
-    return user
+
+
+@pytest.fixture
+def other_document(other_user, make_document):
+    """
+    Fixture for a document owned by other_user.
+    """
+    return make_document(user=other_user, original_filename="other.pdf")
 
 
 @pytest.fixture
 def authenticated_client(api_client, user):
     """
     Fixture for authenticated API client.
+
+    Authenticates without a token, skipping the token lookup on every
+    request. Use token_authenticated_client to test token handling.
     """
-    token, _ = Token.objects.get_or_create(user=user)
+    api_client.force_authenticate(user=user)
+    yield api_client
+    api_client.force_authenticate(user=None)
+
+
+@pytest.fixture
+def token_authenticated_client(api_client, user):
+    """
+    Fixture for API client authenticated with a real token.
+    """
+    token = Token.objects.create(user=user)
     api_client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
     return api_client
 
@@ -59,10 +135,10 @@ def admin_user(db):
     return admin
 
 
-@pytest.fixture
-def sample_pdf_file():
+@pytest.fixture(scope="session")
+def sample_pdf_bytes():
     """
-    Fixture for creating a sample PDF file for testing.
+    Fixture for the bytes of a sample PDF, built once per test session.
     """
     # Create a simple PDF in memory
     buffer = BytesIO()
@@ -73,14 +149,39 @@ def sample_pdf_file():
     p.drawString(100, 690, "Date: 2024-12-02")
     p.showPage()
     p.save()
+    return buffer.getvalue()
+
+
+@pytest.fixture(scope="session")
+def stored_sample_pdf(sample_pdf_bytes):
+    """
+    Fixture for the sample PDF saved to document storage once per test session.
 
-    buffer.seek(0)
-    pdf_file = SimpleUploadedFile(
+    Returns:
+        Storage name of the file, usable as a Document.file value
+    """
+    from django.core.files.base import ContentFile
+    from documents.models import Document
+
+    file_field = Document._meta.get_field('file')
+    name = file_field.storage.save(
+        file_field.generate_filename(None, "test_invoice.pdf"),
+        ContentFile(sample_pdf_bytes)
+    )
+    yield name
+    file_field.storage.delete(name)
+
+
+@pytest.fixture
+def sample_pdf_file(sample_pdf_bytes):
+    """
+    Fixture for creating a sample PDF file for testing.
+    """
+    return SimpleUploadedFile(
         "test_invoice.pdf",
-        buffer.read(),
+        sample_pdf_bytes,
         content_type="application/pdf"
     )
-    return pdf_file
 
 
 @pytest.fixture
@@ -88,16 +189,134 @@ def sample_image_file():
     """
     Fixture for creating a sample image file for testing.
     """
-
-    # Create a simple image
-    image = Image.new('RGB', (100, 100), color='white')
-    buffer = BytesIO()
-    image.save(buffer, format='PNG')
-    buffer.seek(0)
-
-    image_file = SimpleUploadedFile(
+    return SimpleUploadedFile(
         "test_receipt.png",
-        buffer.read(),
+        PNG_1X1_WHITE,
         content_type="image/png"
     )
-    return image_file
+
+
+@pytest.fixture
+def in_memory_storage(settings):
+    """
+    Fixture keeping uploaded files in memory instead of writing them to MEDIA_ROOT.
+
+    Only for tests that never need a file's local path (the extraction task
+    opens documents by path).
+    """
+    settings.STORAGES = {
+        'default': {'BACKEND': 'django.core.files.storage.InMemoryStorage'},
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    }
+
+
+@pytest.fixture
+def make_document(user, stored_sample_pdf):
+    """
+    Fixture for a factory creating documents, owned by the test user by default.
+
+    Documents point at the sample PDF already in storage unless a file is
+    passed. Keyword arguments override the defaults.
+    """
+    from documents.models import Document
+
+    def _make_document(**kwargs):
+        kwargs.setdefault('user', user)
+        kwargs.setdefault('file', stored_sample_pdf)
+        kwargs.setdefault('original_filename', "test.pdf")
+        kwargs.setdefault('file_size', 1024)
+        kwargs.setdefault('file_format', "pdf")
+        return Document.objects.create(**kwargs)
+
+    return _make_document
+
+
+@pytest.fixture
+def make_job(db):
+    """
+    Fixture for a factory creating extraction jobs for a document.
+    """
+    from documents.models import ExtractionJob
+
+    def _make_job(document, **kwargs):
+        return ExtractionJob.objects.create(document=document, **kwargs)
+
+    return _make_job
+
+
+@pytest.fixture
+def openai_on(settings):
+    """
+    Fixture enabling OpenAI extraction with a dummy API key.
+    """
+    settings.USE_OPENAI = True
+    settings.OPENAI_API_KEY = 'test-key'
+
+
+@pytest.fixture
+def openai_off(settings):
+    """
+    Fixture disabling OpenAI extraction, forcing the local OCR + Ollama path.
+    """
+    settings.USE_OPENAI = False
+
+
+@pytest.fixture
+def mock_ocr():
+    """
+    Fixture patching the OCR service used by the extraction task.
+
+    Yields the autospecced service instance; override extract_text per test.
+    """
+    with patch('documents.tasks.OCRService', autospec=True) as service:
+        service.return_value.extract_text.return_value = {
+            'text': 'Invoice #001 Total: $100.00',
+            'method': 'tesseract',
+            'pages': 1
+        }
+        yield service.return_value
+
+
+@pytest.fixture
+def mock_ai():
+    """
+    Fixture patching the Ollama extraction service used by the extraction task.
+
+    Yields the autospecced service instance; override extract_data per test.
+    """
+    with patch('documents.tasks.AIExtractionService', autospec=True) as service:
+        service.return_value.extract_data.return_value = {}
+        yield service.return_value
+
+
+@pytest.fixture
+def mock_openai():
+    """
+    Fixture patching the OpenAI extraction service used by the extraction task.
+
+    Yields the autospecced service instance; override extract_universal_data per test.
+    """
+    with patch('documents.tasks.OpenAIExtractionService', autospec=True) as service:
+        service.return_value.extract_universal_data.return_value = {}
+        yield service.return_value
+
+
+@pytest.fixture
+def extraction_scenario(make_document, make_job):
+    """
+    Fixture for a user's document with a completed extraction job and its data.
+
+    Returns:
+        (document, job, extracted_data) tuple
+    """
+    from documents.models import ExtractedData, ProcessingStatus
+
+    with transaction.atomic():
+        document = make_document()
+        job = make_job(document, status=ProcessingStatus.COMPLETED)
+        extracted_data = ExtractedData.objects.create(
+            extraction_job=job,
+            data={"total": 1000, "vendor": "ACME"},
+            overall_confidence=0.95
+        )
+    return document, job, extracted_data
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-15 23:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0002_rename_documents_d_uploade_78ffff_idx_doc_uploaded_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='file_hash',
+            field=models.CharField(blank=True, default='', help_text='Content hash of the file, used to reuse earlier extractions', max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='document',
+            index=models.Index(fields=['file_hash'], name='doc_file_hash_idx'),
+        ),
+    ]
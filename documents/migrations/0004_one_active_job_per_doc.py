@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-15 23:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0003_document_file_hash'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='extractionjob',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['pending', 'processing'])), fields=('document',), name='one_active_job_per_doc'),
+        ),
+    ]
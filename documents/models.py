@@ -41,6 +41,12 @@ class Document(models.Model):
         max_length=10,
         help_text="File format/extension (e.g., pdf, jpg, png)"
     )
+    file_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        default="",
+        help_text="Content hash of the file, used to reuse earlier extractions"
+    )
 
     # Document classification
     document_type = models.CharField(
@@ -77,6 +83,9 @@ class Document(models.Model):
             # For filtering and searching
             models.Index(fields=["file_format"], name="doc_format_idx"),
             models.Index(fields=["user", "file_format"], name="doc_user_format_idx"),
+
+            # For reusing extractions of identical files
+            models.Index(fields=["file_hash"], name="doc_file_hash_idx"),
         ]
 
         # Database constraints for data integrity
@@ -197,6 +206,12 @@ class ExtractionJob(models.Model):
                 check=models.Q(started_at__isnull=True) | models.Q(completed_at__isnull=True) | models.Q(completed_at__gte=models.F('started_at')),
                 name="job_valid_timestamps"
             ),
+            # Only one pending/processing job per document
+            models.UniqueConstraint(
+                fields=["document"],
+                condition=models.Q(status__in=["pending", "processing"]),
+                name="one_active_job_per_doc"
+            ),
         ]
 
     def __str__(self):
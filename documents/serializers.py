@@ -5,6 +5,7 @@ from drf_spectacular.utils import extend_schema_field
 from drf_spectacular.types import OpenApiTypes
 from typing import Optional, Dict, Any
 from .models import Document, ExtractionJob, ExtractedData
+from .services.hashing import uploaded_file_hash
 from utils.choices import DocumentType, ProcessingStatus
 from utils import loggings
 
@@ -22,6 +23,15 @@ ALLOWED_MIME_TYPES = [
     'image/webp',
 ]
 
+# Human-readable names of extraction methods
+EXTRACTION_METHOD_DISPLAY = {
+    'openai_vision': 'OpenAI GPT-4 Vision',
+    'openai_vision_universal': 'OpenAI GPT-4 Vision (Universal)',
+    'ocr+ollama': 'Tesseract OCR + Ollama AI',
+    'ocr+ai': 'Tesseract OCR + AI',
+    'manual': 'Manual Entry',
+}
+
 
 class DocumentUploadSerializer(serializers.ModelSerializer):
     """
@@ -142,10 +152,17 @@ class DocumentUploadSerializer(serializers.ModelSerializer):
                 original_filename=uploaded_file.name,
                 file_size=uploaded_file.size,
                 file_format=file_extension,
+                file_hash=uploaded_file_hash(uploaded_file),
                 document_type=validated_data.get('document_type', DocumentType.OTHER),
                 description=validated_data.get('description', '')
             )
 
+            # A new document has no jobs yet; seed an empty prefetch so the
+            # response does not query for them
+            document._prefetched_objects_cache = {
+                'extraction_jobs': ExtractionJob.objects.none()
+            }
+
             logger.info(
                 f"Document created successfully: {document.id} "
                 f"(user: {user.email}, size: {document.file_size} bytes)"
@@ -159,6 +176,10 @@ class DocumentUploadSerializer(serializers.ModelSerializer):
                 "Failed to create document. Please try again."
             )
 
+    def to_representation(self, instance):
+        """Represent the created document with the full document details."""
+        return DocumentSerializer(instance, context=self.context).data
+
 
 class DocumentSerializer(serializers.ModelSerializer):
     """
@@ -200,7 +221,13 @@ class DocumentSerializer(serializers.ModelSerializer):
     def get_latest_extraction_job(self, obj) -> Optional[Dict[str, Any]]:
         """Get latest extraction job details."""
         try:
-            latest_job = obj.extraction_jobs.order_by('-created_at').first()
+            # Views prefetch jobs newest first; fall back to a query otherwise
+            prefetched = getattr(obj, '_prefetched_objects_cache', {}).get('extraction_jobs')
+            if prefetched is not None:
+                latest_job = prefetched[0] if prefetched else None
+            else:
+                latest_job = obj.extraction_jobs.order_by('-created_at').first()
+
             if latest_job:
                 return {
                     'id': str(latest_job.id),
@@ -336,11 +363,4 @@ class ExtractedDataSerializer(serializers.ModelSerializer):
     @extend_schema_field(OpenApiTypes.STR)
     def get_extraction_method_display(self, obj) -> str:
         """Get human-readable extraction method."""
-        method_display = {
-            'openai_vision': 'OpenAI GPT-4 Vision',
-            'openai_vision_universal': 'OpenAI GPT-4 Vision (Universal)',
-            'ocr+ollama': 'Tesseract OCR + Ollama AI',
-            'ocr+ai': 'Tesseract OCR + AI',
-            'manual': 'Manual Entry',
-        }
-        return method_display.get(obj.extraction_method, obj.extraction_method)
+        return EXTRACTION_METHOD_DISPLAY.get(obj.extraction_method, obj.extraction_method)
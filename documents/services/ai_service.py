@@ -4,12 +4,19 @@ AI Extraction Service using Ollama (Free Local LLM).
 Provides intelligent data extraction from document text.
 """
 import json
+import httpx
 import ollama
 from typing import Dict, Optional
+from django.core.cache import cache
 from utils import loggings
 
+from .hashing import text_content_hash
+
 logger = loggings.setup_logging()
 
+# Local generation can take minutes on CPU, but a dead server should fail fast
+OLLAMA_TIMEOUT = httpx.Timeout(300.0, connect=5.0)
+
 
 class AIExtractionService:
     """
@@ -18,17 +25,31 @@ class AIExtractionService:
     Uses Ollama with Llama 3.2 (free, runs locally).
     """
 
-    def __init__(self, base_url: str = "http://localhost:11434", model: str = "llama3.2"):
+    def __init__(
+        self,
+        base_url: str = "http://localhost:11434",
+        model: str = "llama3.2",
+        cache_timeout: Optional[int] = None
+    ):
         """
         Initialize AI extraction service.
 
         Args:
             base_url: Ollama server URL
             model: Model to use for extraction
+            cache_timeout: Seconds to cache extractions by input text hash
+                (None disables caching)
         """
         self.base_url = base_url
         self.model = model
-        self.client = ollama.Client(host=base_url)
+        self.cache_timeout = cache_timeout
+        # The underlying httpx client keeps connections alive, so a service
+        # reused across tasks talks to Ollama over a warm connection
+        self.client = ollama.Client(
+            host=base_url,
+            timeout=OLLAMA_TIMEOUT,
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=8)
+        )
         logger.info(f"AI Extraction Service initialized with model: {model}")
 
     def extract_invoice_data(self, text: str) -> Dict:
@@ -225,12 +246,26 @@ class AIExtractionService:
 
         method = extraction_methods.get(document_type)
 
-        if method:
-            return method(text)
-        else:
+        if not method:
             logger.warning(f"No specific extraction method for {document_type}, using generic extraction")
             return self._extract_generic_data(text, document_type)
 
+        # The same text always produces the same prompt
+        cache_key = None
+        if self.cache_timeout:
+            cache_key = f"ollama_extract:{text_content_hash(text)}:{self.model}:{document_type}"
+            cached = cache.get(cache_key)
+            if cached is not None:
+                logger.info("Using cached AI extraction")
+                return cached
+
+        data = method(text)
+
+        if cache_key and data.get('extraction_status') != 'failed':
+            cache.set(cache_key, data, self.cache_timeout)
+
+        return data
+
     def _extract_generic_data(self, text: str, document_type: str) -> Dict:
         """
         Generic data extraction for unsupported document types.
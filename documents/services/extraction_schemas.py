@@ -0,0 +1,95 @@
+"""
+Structured output schemas for OpenAI universal document extraction.
+
+These models are sent as the `response_format` of the chat completion so
+the model is constrained to emit valid JSON with this exact structure.
+"""
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+
+
+class PartyDetails(BaseModel):
+    """A party named on the document (issuer or recipient)."""
+    name: Optional[str]
+    address: Optional[str]
+    contact: Optional[str]
+
+
+class Parties(BaseModel):
+    """Issuer and recipient of the document."""
+    issuer: Optional[PartyDetails]
+    recipient: Optional[PartyDetails]
+
+
+class LineItem(BaseModel):
+    """A single line of an invoice, receipt or statement."""
+    description: Optional[str]
+    quantity: Optional[float]
+    unit_price: Optional[float]
+    amount: Optional[float]
+
+
+class FinancialData(BaseModel):
+    """Monetary information found on the document."""
+    currency: Optional[str]
+    subtotal: Optional[float]
+    tax: Optional[float]
+    total: Optional[float]
+    payment_method: Optional[str]
+    line_items: List[LineItem]
+
+
+class DocumentDates(BaseModel):
+    """Dates found on the document, in YYYY-MM-DD format."""
+    issue_date: Optional[str]
+    due_date: Optional[str]
+    valid_from: Optional[str]
+    valid_until: Optional[str]
+
+
+class ExtractedField(BaseModel):
+    """
+    Any other field found on the document.
+
+    Structured outputs do not allow free-form objects, so arbitrary fields
+    are returned as name/value pairs and folded into a dict afterwards.
+    """
+    name: str
+    value: Optional[str]
+
+
+class PageMetadata(BaseModel):
+    """Metadata about the analysed page."""
+    page_number: int
+    total_pages: int
+    has_signature: bool
+    has_stamp: bool
+    language: Optional[str]
+
+
+class DocumentExtraction(BaseModel):
+    """Universal extraction result for a single document page."""
+    document_type: str
+    document_title: Optional[str]
+    document_number: Optional[str]
+    date_issued: Optional[str]
+    parties: Optional[Parties]
+    financial_data: Optional[FinancialData]
+    dates: Optional[DocumentDates]
+    extracted_fields: List[ExtractedField]
+    text_content: Optional[str]
+    metadata: PageMetadata
+
+    def to_dict(self) -> Dict:
+        """
+        Convert to the plain dictionary format stored in ExtractedData.
+
+        Returns:
+            Extraction data with `extracted_fields` as a name -> value mapping
+        """
+        data = self.model_dump()
+        data['extracted_fields'] = {
+            field['name']: field['value'] for field in data['extracted_fields']
+        }
+        return data
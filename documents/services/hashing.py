@@ -0,0 +1,88 @@
+"""
+Content hashing helpers for document caches.
+
+Uses BLAKE3 when the optional `blake3` package is installed and falls back
+to the standard library's BLAKE2b otherwise.
+"""
+import hashlib
+import mmap
+
+try:
+    # Optional: SIMD-accelerated, several times faster than SHA-256
+    import blake3
+except ImportError:
+    blake3 = None
+
+# 16 bytes is plenty for cache keys and keeps them short
+DIGEST_SIZE = 16
+
+
+def content_hash(data) -> str:
+    """
+    Hash an in-memory buffer (bytes, memoryview or mmap) without copying it.
+
+    Args:
+        data: Object supporting the buffer protocol
+
+    Returns:
+        Hex digest of the buffer contents
+    """
+    if blake3 is not None:
+        return blake3.blake3(data).hexdigest(length=DIGEST_SIZE)
+    return hashlib.blake2b(data, digest_size=DIGEST_SIZE).hexdigest()
+
+
+def file_content_hash(file_path: str) -> str:
+    """
+    Hash the contents of a file without reading it into memory.
+
+    Args:
+        file_path: Path to file
+
+    Returns:
+        Hex digest of the file contents
+    """
+    with open(file_path, "rb") as f:
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return content_hash(mapped)
+        except ValueError:
+            # Empty files cannot be memory-mapped
+            return content_hash(f.read())
+
+
+def uploaded_file_hash(uploaded_file) -> str:
+    """
+    Hash an uploaded file chunk by chunk, matching file_content_hash.
+
+    Args:
+        uploaded_file: Django UploadedFile
+
+    Returns:
+        Hex digest of the file contents
+    """
+    if blake3 is not None:
+        hasher = blake3.blake3()
+    else:
+        hasher = hashlib.blake2b(digest_size=DIGEST_SIZE)
+
+    for chunk in uploaded_file.chunks():
+        hasher.update(chunk)
+    uploaded_file.seek(0)
+
+    if blake3 is not None:
+        return hasher.hexdigest(length=DIGEST_SIZE)
+    return hasher.hexdigest()
+
+
+def text_content_hash(text: str) -> str:
+    """
+    Hash a string, e.g. OCR output used as an AI prompt.
+
+    Args:
+        text: Text to hash
+
+    Returns:
+        Hex digest of the UTF-8 encoded text
+    """
+    return content_hash(text.encode("utf-8"))
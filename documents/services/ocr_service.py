@@ -6,31 +6,294 @@ Provides text extraction from images and PDFs with preprocessing for better accu
 import pytesseract
 from PIL import Image, ImageEnhance
 import fitz  # PyMuPDF
-from pdf2image import convert_from_path
-import tempfile
+import io
+import statistics
+import threading
 from pathlib import Path
 from typing import Dict, Optional
+from django.core.cache import cache
 from utils import loggings
 
+from .hashing import file_content_hash
+from .pdf_renderer import render_pdf_page
+
+try:
+    # Optional: keeps the Tesseract engine loaded in-process
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
 logger = loggings.setup_logging()
 
+# PSM 6 = Assume a single uniform block of text
+# OEM 3 = Default, based on what is available
+TESSERACT_CONFIG = r'--oem 3 --psm 6 -c preserve_interword_spaces=1'
+
+# Scanned PDFs are OCR'd at OCR_LOW_DPI when the first page reads with at
+# least OCR_MIN_CONFIDENCE mean word confidence, otherwise at OCR_HIGH_DPI.
+# Tesseract time scales with pixel count, so clean scans finish much faster.
+# OCR_HIGH_DPI renders of A4 pages fit OCR_MAX_IMAGE_DIMENSION; anything
+# higher would only be downscaled again.
+OCR_LOW_DPI = 150
+OCR_HIGH_DPI = 300
+OCR_MIN_CONFIDENCE = 70
+
+# Longest edge, in pixels, of images handed to Tesseract (A4 at 300 DPI).
+# Larger photos and scans are downscaled first: Tesseract time grows with
+# pixel count and text stays legible well below this size.
+OCR_MAX_IMAGE_DIMENSION = 3508
+
+# Digital PDFs whose text layer holds fewer characters than this are OCR'd
+MIN_DIRECT_TEXT_LENGTH = 50
+
+# A text layer good enough to skip Vision/OCR entirely must hold at least
+# TEXT_LAYER_MIN_LENGTH characters, mostly letters (not garbled glyph codes)
+TEXT_LAYER_MIN_LENGTH = 200
+TEXT_LAYER_MIN_ALPHA_RATIO = 0.5
+
+
+def otsu_threshold(histogram: list) -> int:
+    """
+    Pick the gray level that best separates text from background (Otsu).
+
+    Args:
+        histogram: 256-bin grayscale histogram
+
+    Returns:
+        Threshold between 0 and 255
+    """
+    total = sum(histogram)
+    weighted_total = sum(level * count for level, count in enumerate(histogram))
+
+    background_count = 0
+    background_sum = 0
+    best_threshold = 0
+    best_variance = 0.0
+
+    for level, count in enumerate(histogram):
+        background_count += count
+        if background_count == 0:
+            continue
+        foreground_count = total - background_count
+        if foreground_count == 0:
+            break
+
+        background_sum += level * count
+        background_mean = background_sum / background_count
+        foreground_mean = (weighted_total - background_sum) / foreground_count
+
+        # Between-class variance
+        variance = background_count * foreground_count * (background_mean - foreground_mean) ** 2
+        if variance > best_variance:
+            best_variance = variance
+            best_threshold = level
+
+    return best_threshold
+
+
+def count_pages_needing_ocr(pdf_path: str) -> int:
+    """
+    Count the pages of a PDF that will have to go through OCR.
+
+    Args:
+        pdf_path: Path to PDF file
+
+    Returns:
+        Page count for scanned PDFs, 0 when the text layer is usable
+    """
+    with fitz.open(pdf_path) as doc:
+        text_length = 0
+        for page in doc:
+            text_length += len(page.get_text().strip())
+            if text_length >= MIN_DIRECT_TEXT_LENGTH:
+                return 0
+        return len(doc)
+
+
+def extract_text_layer(pdf_path: str) -> Optional[Dict[str, any]]:
+    """
+    Read the embedded text of a digital PDF if it is good enough to use as is.
+
+    Args:
+        pdf_path: Path to PDF file
+
+    Returns:
+        Dictionary in the format of OCRService.extract_text, or None when
+        the PDF has no substantial, readable text layer
+    """
+    with fitz.open(pdf_path) as doc:
+        text = '\n\n'.join(page.get_text() for page in doc).strip()
+        pages = len(doc)
+
+    if len(text) < TEXT_LAYER_MIN_LENGTH:
+        return None
+
+    visible = [char for char in text if not char.isspace()]
+    alpha_ratio = sum(char.isalpha() for char in visible) / len(visible)
+    if alpha_ratio < TEXT_LAYER_MIN_ALPHA_RATIO:
+        logger.debug(f"PDF text layer looks garbled (alpha ratio {alpha_ratio:.2f})")
+        return None
+
+    return {
+        'text': text,
+        'pages': pages,
+        'method': 'direct'
+    }
+
 
 class OCRService:
     """
     Service for extracting text from documents using Tesseract OCR.
     """
 
-    def __init__(self, tesseract_cmd: Optional[str] = None):
+    def __init__(
+        self,
+        tesseract_cmd: Optional[str] = None,
+        preprocess_images: bool = True,
+        cache_timeout: Optional[int] = None
+    ):
         """
         Initialize OCR service.
 
         Args:
             tesseract_cmd: Path to tesseract executable
+            preprocess_images: Enhance contrast/sharpness of image files before OCR.
+                When disabled, the file path is handed straight to Tesseract,
+                skipping the PIL decode and re-encode.
+            cache_timeout: Seconds to cache OCR results by file content hash
+                (None disables caching)
         """
         if tesseract_cmd:
             pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
 
-        logger.info("OCR Service initialized")
+        self.preprocess_images = preprocess_images
+        self.cache_timeout = cache_timeout
+
+        # Persistent Tesseract API (avoids a subprocess + model load per page).
+        # PyTessBaseAPI is not thread-safe, so calls are serialized with a lock.
+        self._api = None
+        self._api_lock = threading.Lock()
+        if tesserocr is not None:
+            try:
+                self._api = tesserocr.PyTessBaseAPI(
+                    lang='eng',
+                    psm=tesserocr.PSM.SINGLE_BLOCK,
+                    oem=tesserocr.OEM.DEFAULT
+                )
+                self._api.SetVariable('preserve_interword_spaces', '1')
+            except Exception as e:
+                logger.warning(f"tesserocr unavailable, falling back to pytesseract: {str(e)}")
+                self._api = None
+
+        logger.info(f"OCR Service initialized (engine: {'tesserocr' if self._api else 'pytesseract'})")
+
+    def _image_to_string(self, image: Image.Image) -> str:
+        """
+        Run Tesseract on a PIL image.
+
+        Uses the persistent tesserocr API when available, otherwise
+        falls back to pytesseract.
+
+        Args:
+            image: Preprocessed PIL image
+
+        Returns:
+            Recognized text
+        """
+        if self._api is not None:
+            with self._api_lock:
+                self._api.SetImage(image)
+                return self._api.GetUTF8Text()
+
+        return pytesseract.image_to_string(image, config=TESSERACT_CONFIG)
+
+    def _image_to_string_with_confidence(self, image: Image.Image) -> tuple:
+        """
+        Run Tesseract on a PIL image and report its mean word confidence.
+
+        Args:
+            image: Preprocessed PIL image
+
+        Returns:
+            Tuple of (text, mean_confidence) with confidence in the range 0-100
+        """
+        if self._api is not None:
+            with self._api_lock:
+                self._api.SetImage(image)
+                return self._api.GetUTF8Text(), self._api.MeanTextConf()
+
+        data = pytesseract.image_to_data(
+            image, config=TESSERACT_CONFIG, output_type=pytesseract.Output.DICT
+        )
+
+        # Rebuild the text line by line from the recognized words
+        lines = {}
+        confidences = []
+        for i, word in enumerate(data['text']):
+            confidence = float(data['conf'][i])
+            if confidence < 0:
+                continue
+            confidences.append(confidence)
+            line_key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+            lines.setdefault(line_key, []).append(word)
+
+        text = '\n'.join(' '.join(words) for words in lines.values())
+        mean_confidence = statistics.mean(confidences) if confidences else 0.0
+        return text, mean_confidence
+
+    def _enhance_image(self, image: Image.Image) -> Image.Image:
+        """
+        Clean up an image so Tesseract has less work to do.
+
+        Converts to grayscale, caps the size at OCR_MAX_IMAGE_DIMENSION,
+        boosts contrast and sharpness, then binarizes with Otsu's threshold.
+        Tesseract reads clean black and white images faster and skips its
+        own thresholding pass.
+
+        Args:
+            image: PIL image
+
+        Returns:
+            Binarized grayscale image
+        """
+        # Tesseract only uses luminance - one channel instead of three
+        image = image.convert('L')
+
+        longest_edge = max(image.size)
+        if longest_edge > OCR_MAX_IMAGE_DIMENSION:
+            scale = OCR_MAX_IMAGE_DIMENSION / longest_edge
+            image = image.resize(
+                (round(image.width * scale), round(image.height * scale)),
+                Image.Resampling.LANCZOS
+            )
+
+        # Increase contrast
+        enhancer = ImageEnhance.Contrast(image)
+        image = enhancer.enhance(2.0)
+
+        # Increase sharpness
+        enhancer = ImageEnhance.Sharpness(image)
+        image = enhancer.enhance(1.5)
+
+        threshold = otsu_threshold(image.histogram())
+        return image.point([0 if level <= threshold else 255 for level in range(256)])
+
+    def _file_to_string(self, image_path: str) -> str:
+        """
+        Run Tesseract directly on an image file without decoding it in Python.
+
+        Args:
+            image_path: Path to image file
+
+        Returns:
+            Recognized text
+        """
+        if self._api is not None:
+            with self._api_lock:
+                self._api.SetImageFile(image_path)
+                return self._api.GetUTF8Text()
+
+        return pytesseract.image_to_string(image_path, config=TESSERACT_CONFIG)
 
     def extract_text_from_image(self, image_path: str) -> str:
         """
@@ -45,27 +308,20 @@ class OCRService:
         try:
             logger.info(f"Extracting text from image: {image_path}")
 
+            if not self.preprocess_images:
+                # Let Tesseract read the file itself - no PIL round-trip
+                text = self._file_to_string(image_path)
+                logger.info(f"Extracted {len(text)} characters from image")
+                return text.strip()
+
             # Open and preprocess image
             image = Image.open(image_path)
 
-            # Convert to RGB if needed
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
-
             # Enhance image quality for better OCR
-            # Increase contrast
-            enhancer = ImageEnhance.Contrast(image)
-            image = enhancer.enhance(2.0)
-
-            # Increase sharpness
-            enhancer = ImageEnhance.Sharpness(image)
-            image = enhancer.enhance(1.5)
+            image = self._enhance_image(image)
 
             # Use better Tesseract config for receipts/documents
-            # PSM 6 = Assume a single uniform block of text
-            # OEM 3 = Default, based on what is available
-            custom_config = r'--oem 3 --psm 6 -c preserve_interword_spaces=1'
-            text = pytesseract.image_to_string(image, config=custom_config)
+            text = self._image_to_string(image)
 
             logger.info(f"Extracted {len(text)} characters from image")
             logger.debug(f"OCR Text Preview: {text[:200]}")
@@ -76,7 +332,7 @@ class OCRService:
             logger.exception(f"Error extracting text from image: {str(e)}")
             raise
 
-    def extract_text_from_pdf(self, pdf_path: str) -> Dict[str, any]:
+    def extract_text_from_pdf(self, pdf_path: str, dpi: Optional[int] = None) -> Dict[str, any]:
         """
         Extract text from PDF file.
 
@@ -85,6 +341,7 @@ class OCRService:
 
         Args:
             pdf_path: Path to PDF file
+            dpi: OCR rendering resolution (default: chosen adaptively)
 
         Returns:
             Dictionary containing:
@@ -95,16 +352,18 @@ class OCRService:
         try:
             logger.info(f"Extracting text from PDF: {pdf_path}")
 
-            # Try direct text extraction first (faster for digital PDFs)
-            text, pages = self._extract_text_direct(pdf_path)
+            # Open once and share the handle between the direct and OCR passes
+            with fitz.open(pdf_path) as doc:
+                # Try direct text extraction first (faster for digital PDFs)
+                text, pages = self._extract_text_direct(doc)
 
-            # If no text found, use OCR
-            if not text or len(text.strip()) < 50:
-                logger.info("Direct extraction yielded little text, using OCR")
-                text, pages = self._extract_text_ocr(pdf_path)
-                method = 'ocr'
-            else:
-                method = 'direct'
+                # If no text found, use OCR
+                if not text or len(text.strip()) < MIN_DIRECT_TEXT_LENGTH:
+                    logger.info("Direct extraction yielded little text, using OCR")
+                    text, pages = self._extract_text_ocr(doc, dpi=dpi)
+                    method = 'ocr'
+                else:
+                    method = 'direct'
 
             logger.info(f"Extracted {len(text)} characters from {pages} pages using {method}")
 
@@ -118,96 +377,191 @@ class OCRService:
             logger.exception(f"Error extracting text from PDF: {str(e)}")
             raise
 
-    def _extract_text_direct(self, pdf_path: str) -> tuple:
+    def _extract_text_direct(self, doc: fitz.Document) -> tuple:
         """
         Extract text directly from PDF (for digital PDFs).
 
+        Pages are read sequentially on purpose: PyMuPDF does not support
+        sharing a document between threads, and Celery's prefork workers
+        are daemonic so they cannot start a process pool either.
+
         Args:
-            pdf_path: Path to PDF file
+            doc: Open PyMuPDF document
 
         Returns:
             Tuple of (text, page_count)
         """
         try:
-            doc = fitz.open(pdf_path)
-            text_parts = []
+            page_count = len(doc)
 
-            for page_num in range(len(doc)):
-                page = doc[page_num]
-                text_parts.append(page.get_text())
+            # Stream page text into one buffer instead of holding a list of
+            # page strings plus the joined copy
+            buffer = io.StringIO()
+            for page_num, page in enumerate(doc):
+                if page_num:
+                    buffer.write('\n\n')
+                buffer.write(page.get_text())
 
-            doc.close()
-
-            return '\n\n'.join(text_parts), len(doc)
+            return buffer.getvalue(), page_count
 
         except Exception as e:
             logger.error(f"Direct text extraction failed: {str(e)}")
             return '', 0
 
-    def _extract_text_ocr(self, pdf_path: str) -> tuple:
+    def _extract_text_ocr(self, doc: fitz.Document, dpi: Optional[int] = None) -> tuple:
         """
         Extract text from PDF using OCR (for scanned PDFs).
 
+        When no DPI is given, the first page is OCR'd at OCR_LOW_DPI and the
+        rest of the document stays at that resolution only if Tesseract is
+        confident in the result; otherwise every page uses OCR_HIGH_DPI.
+
         Args:
-            pdf_path: Path to PDF file
+            doc: Open PyMuPDF document
+            dpi: Rendering resolution (default: chosen adaptively)
 
         Returns:
             Tuple of (text, page_count)
         """
         try:
-            # Convert PDF to images with higher DPI for better quality
-            with tempfile.TemporaryDirectory() as temp_dir:
-                logger.info("Converting PDF to images for OCR")
-                # Use 400 DPI for better quality
-                images = convert_from_path(pdf_path, dpi=400)
-
-                text_parts = []
-                for i, image in enumerate(images):
-                    logger.debug(f"OCR processing page {i+1}/{len(images)}")
-
-                    # Preprocess image
-                    # Increase contrast
-                    enhancer = ImageEnhance.Contrast(image)
-                    image = enhancer.enhance(2.0)
-
-                    # Increase sharpness
-                    enhancer = ImageEnhance.Sharpness(image)
-                    image = enhancer.enhance(1.5)
-
-                    # Better Tesseract config
-                    custom_config = r'--oem 3 --psm 6 -c preserve_interword_spaces=1'
-                    text = pytesseract.image_to_string(image, config=custom_config)
+            page_count = len(doc)
+            text_parts = []
+
+            if dpi is None and page_count:
+                first_page = self._enhance_image(render_pdf_page(doc, 0, dpi=OCR_LOW_DPI))
+                text, confidence = self._image_to_string_with_confidence(first_page)
+                logger.debug(f"OCR confidence at {OCR_LOW_DPI} DPI: {confidence:.1f}")
+
+                if confidence >= OCR_MIN_CONFIDENCE:
+                    dpi = OCR_LOW_DPI
                     text_parts.append(text)
+                else:
+                    dpi = OCR_HIGH_DPI
+
+            logger.info(f"Running OCR on {page_count} pages at {dpi} DPI")
 
-                full_text = '\n\n'.join(text_parts)
-                logger.debug(f"OCR Text Preview: {full_text[:300]}")
+            # Render one page at a time so only a single page bitmap is held in memory
+            for i in range(len(text_parts), page_count):
+                logger.debug(f"OCR processing page {i+1}/{page_count}")
 
-                return full_text, len(images)
+                image = self._enhance_image(render_pdf_page(doc, i, dpi=dpi))
+                text_parts.append(self._image_to_string(image))
+
+            full_text = '\n\n'.join(text_parts)
+            logger.debug(f"OCR Text Preview: {full_text[:300]}")
+
+            return full_text, page_count
 
         except Exception as e:
             logger.error(f"OCR extraction failed: {str(e)}")
             raise
 
-    def extract_text(self, file_path: str) -> Dict[str, any]:
+    def extract_text_from_pdf_page(self, pdf_path: str, page_index: int, dpi: Optional[int] = None) -> Dict[str, any]:
+        """
+        OCR a single page of a scanned PDF.
+
+        Used to fan a multi-page document out over several workers. When no
+        DPI is given, the page is read at OCR_LOW_DPI and re-read at
+        OCR_HIGH_DPI only if Tesseract is not confident in the result.
+
+        Args:
+            pdf_path: Path to PDF file
+            page_index: Zero-based page index
+            dpi: Rendering resolution (default: chosen adaptively)
+
+        Returns:
+            Dictionary containing:
+                - text: Extracted text
+                - page: Page index
+                - method: Always 'ocr'
+        """
+        with fitz.open(pdf_path) as doc:
+            if dpi is None:
+                image = self._enhance_image(render_pdf_page(doc, page_index, dpi=OCR_LOW_DPI))
+                text, confidence = self._image_to_string_with_confidence(image)
+                logger.debug(f"Page {page_index + 1} OCR confidence at {OCR_LOW_DPI} DPI: {confidence:.1f}")
+
+                if confidence < OCR_MIN_CONFIDENCE:
+                    dpi = OCR_HIGH_DPI
+
+            if dpi is not None:
+                image = self._enhance_image(render_pdf_page(doc, page_index, dpi=dpi))
+                text = self._image_to_string(image)
+
+        return {
+            'text': text.strip(),
+            'page': page_index,
+            'method': 'ocr'
+        }
+
+    def _cache_key(self, file_path: str, file_hash: Optional[str] = None) -> str:
+        """Cache key for the OCR result of a file's contents."""
+        return f"ocr:{file_hash or file_content_hash(file_path)}:{int(self.preprocess_images)}"
+
+    def get_cached_text(self, file_path: str, file_hash: Optional[str] = None) -> Optional[Dict[str, any]]:
+        """
+        Look up a previous OCR result for identical file contents.
+
+        Args:
+            file_path: Path to file
+            file_hash: Content hash of the file if already known (e.g.
+                Document.file_hash); the file is hashed otherwise
+
+        Returns:
+            Cached extraction result, or None on a miss or when caching is off
+        """
+        if not self.cache_timeout:
+            return None
+        return cache.get(self._cache_key(file_path, file_hash))
+
+    def cache_text(self, file_path: str, result: Dict[str, any], file_hash: Optional[str] = None) -> None:
+        """
+        Store an OCR result keyed by the file's contents.
+
+        Args:
+            file_path: Path to file
+            result: Extraction result as returned by extract_text
+            file_hash: Content hash of the file if already known
+        """
+        if self.cache_timeout:
+            cache.set(self._cache_key(file_path, file_hash), result, self.cache_timeout)
+
+    def extract_text(self, file_path: str, file_hash: Optional[str] = None) -> Dict[str, any]:
         """
         Extract text from any supported file type.
 
         Args:
             file_path: Path to file
+            file_hash: Content hash of the file if already known; otherwise
+                the file is hashed once for both the cache lookup and store
 
         Returns:
             Dictionary containing extracted text and metadata
         """
         file_ext = Path(file_path).suffix.lower()
 
+        if file_ext not in ['.pdf', '.jpg', '.jpeg', '.png']:
+            raise ValueError(f"Unsupported file type: {file_ext}")
+
+        if self.cache_timeout and not file_hash:
+            file_hash = file_content_hash(file_path)
+
+        # Identical file contents always OCR to the same text
+        cached = self.get_cached_text(file_path, file_hash)
+        if cached is not None:
+            logger.info(f"Using cached OCR result for {file_path}")
+            return cached
+
         if file_ext == '.pdf':
-            return self.extract_text_from_pdf(file_path)
-        elif file_ext in ['.jpg', '.jpeg', '.png']:
+            result = self.extract_text_from_pdf(file_path)
+        else:
             text = self.extract_text_from_image(file_path)
-            return {
+            result = {
                 'text': text,
                 'pages': 1,
                 'method': 'ocr'
             }
-        else:
-            raise ValueError(f"Unsupported file type: {file_ext}")
+
+        self.cache_text(file_path, result, file_hash)
+
+        return result
@@ -5,19 +5,77 @@ This service uses GPT-4 Vision to analyze ANY document type and extract
 ALL meaningful information with high accuracy.
 """
 import base64
+import textwrap
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Optional, List
-import json
-from openai import OpenAI
-from pdf2image import convert_from_path
-from PIL import Image
-import io
+from typing import Dict, Optional, List, Literal
+import httpx
+from openai import OpenAI, DefaultHttpxClient
+import fitz  # PyMuPDF
 import mimetypes
+import mmap
 
+from django.core.cache import cache
 from utils import loggings
+from .extraction_schemas import DocumentExtraction
+from .hashing import content_hash
+from .pdf_renderer import render_pdf_page_png
 
 logger = loggings.setup_logging()
 
+# Retries for transient OpenAI errors (rate limits, 5xx, timeouts)
+OPENAI_MAX_RETRIES = 5
+
+# Longest edge (px) per Vision detail level. OpenAI rescales anything larger
+# server-side, so shipping more pixels only costs upload time and tokens.
+IMAGE_MAX_DIMENSIONS = {
+    "low": 768,
+    "high": 2048,
+    "auto": 2048,
+}
+
+
+# System prompt for universal extraction; dedented once at import time so
+# no indentation whitespace is sent to the model.
+UNIVERSAL_PROMPT_TEMPLATE = textwrap.dedent("""
+    ### CONTEXT ###
+    You are an expert document analyst with the ability to extract ALL meaningful information from ANY type of document.
+    {type_hint}
+    This is page {page_num} of {total_pages}.
+
+    ### INSTRUCTION ###
+    Analyze the provided document image and extract ALL important information in a structured format.
+
+    ### EXTRACTION RULES ###
+    1. **Identify Document Type**: Determine what kind of document this is (invoice, receipt, contract, ID card, form, letter, etc.)
+    2. **Extract ALL Fields**: Find and extract every piece of meaningful information
+    3. **Be Accurate**: Extract EXACT values as they appear - do not guess or make up data
+    4. **Use Proper Formats**:
+    - Dates: YYYY-MM-DD format
+    - Numbers: Numeric values without currency symbols
+    - Currency: Separate field (USD, EUR, RWF, etc.)
+    5. **Structure Data Logically**: Group related information together
+    6. **Handle Missing Data**: Use null for fields not found in the document
+    7. **Other Fields**: Put any information without a dedicated field in extracted_fields as name/value pairs
+
+    ### IMPORTANT ###
+    - Extract ONLY what you can see in the image
+    - Be thorough - don't miss any important information
+    - If a section doesn't apply, use null
+    - Prioritize accuracy over completeness
+""").strip()
+
+
+@lru_cache(maxsize=64)
+def _render_universal_prompt(document_type: Optional[str], page_num: int, total_pages: int) -> str:
+    """Fill the universal prompt template (cached - prompts repeat across documents)."""
+    type_hint = f"The document is likely a {document_type}." if document_type else "Identify the document type automatically."
+    return UNIVERSAL_PROMPT_TEMPLATE.format(
+        type_hint=type_hint,
+        page_num=page_num,
+        total_pages=total_pages
+    )
+
 
 class OpenAIExtractionService:
     """
@@ -27,7 +85,15 @@ class OpenAIExtractionService:
     information automatically, without requiring predefined templates.
     """
 
-    def __init__(self, api_key: str, model: str = "gpt-4o-mini", organization: Optional[str] = None, project: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "gpt-4o-mini",
+        organization: Optional[str] = None,
+        project: Optional[str] = None,
+        image_detail: Literal["low", "high", "auto"] = "high",
+        cache_timeout: Optional[int] = None
+    ):
         """
         Initialize OpenAI extraction service.
 
@@ -36,43 +102,52 @@ class OpenAIExtractionService:
             model: Model to use (default to gpt-4o-mini for cost efficiency)
             organization: OpenAI Organization ID (optional)
             project: OpenAI Project ID (optional)
+            image_detail: Vision detail level ("low", "high" or "auto")
+            cache_timeout: Seconds to cache extractions by file content hash
+                (None disables caching)
         """
+        # Pooled keep-alive connections avoid a TLS handshake per page, and the
+        # SDK retries 408/409/429/5xx and timeouts with exponential backoff
         self.client = OpenAI(
             api_key=api_key,
             organization=organization,
-            project=project
+            project=project,
+            max_retries=OPENAI_MAX_RETRIES,
+            timeout=httpx.Timeout(60.0, connect=5.0),
+            http_client=DefaultHttpxClient(
+                limits=httpx.Limits(max_connections=32, max_keepalive_connections=32)
+            )
         )
         self.model = model
+        self.image_detail = image_detail
+        self.cache_timeout = cache_timeout
         logger.info(f"OpenAI Universal Extraction Service initialized with model: {model}")
 
-    def _image_to_base64(self, image_path: str) -> str:
+    def _image_to_base64(self, image_bytes) -> str:
         """
-        Convert image file to base64 string.
+        Convert image file contents to base64 string.
 
         Args:
-            image_path: Path to image file
+            image_bytes: Image file contents (bytes or memory map)
 
         Returns:
             Base64 encoded image string
-
-        Raises:
-            IOError: If file cannot be read
         """
         try:
-            with open(image_path, "rb") as image_file:
-                encoded = base64.b64encode(image_file.read()).decode('utf-8')
-                logger.debug(f"Successfully encoded image: {image_path}")
-                return encoded
+            # Encoded straight from the mapped file; base64 output is pure ASCII
+            encoded = base64.b64encode(image_bytes).decode('ascii')
+            logger.debug("Successfully encoded image")
+            return encoded
         except Exception as e:
-            logger.error(f"Failed to encode image {image_path}: {str(e)}")
+            logger.error(f"Failed to encode image: {str(e)}")
             raise
 
-    def _pdf_to_base64_images(self, pdf_path: str, max_pages: int = 10) -> List[str]:
+    def _pdf_to_base64_images(self, pdf_bytes, max_pages: int = 10) -> List[str]:
         """
         Convert PDF pages to base64 encoded images.
 
         Args:
-            pdf_path: Path to PDF file
+            pdf_bytes: PDF file contents (bytes or memory map)
             max_pages: Maximum number of pages to process (default: 10)
 
         Returns:
@@ -82,29 +157,36 @@ class OpenAIExtractionService:
             Exception: If PDF conversion fails
         """
         try:
-            logger.info(f"Converting PDF to images: {pdf_path}")
-            # Convert PDF to images with high DPI for better quality
-            images = convert_from_path(pdf_path, dpi=300)
-
-            # Limit pages to avoid excessive costs
-            images = images[:max_pages]
-            logger.info(f"Processing {len(images)} pages from PDF")
+            logger.info("Converting PDF to images")
+            # Render at most 300 DPI, capped to the longest edge OpenAI keeps
+            # for the detail level - it discards the extra pixels anyway
+            max_dimension = IMAGE_MAX_DIMENSIONS.get(self.image_detail, IMAGE_MAX_DIMENSIONS["high"])
 
             base64_images = []
-            for idx, image in enumerate(images):
-                # Convert PIL Image to base64
-                buffered = io.BytesIO()
-                image.save(buffered, format="PNG")
-                img_str = base64.b64encode(buffered.getvalue()).decode('utf-8')
-                base64_images.append(img_str)
-                logger.debug(f"Encoded page {idx + 1}/{len(images)}")
+            # The view must outlive the document and be released before the
+            # caller unmaps the file
+            with memoryview(pdf_bytes) as view, fitz.open(stream=view, filetype="pdf") as doc:
+                # Limit pages to avoid excessive costs
+                page_count = min(len(doc), max_pages)
+                logger.info(f"Processing {page_count} pages from PDF")
+
+                for idx in range(page_count):
+                    png_bytes = render_pdf_page_png(doc, idx, dpi=300, max_dimension=max_dimension)
+                    base64_images.append(base64.b64encode(png_bytes).decode('ascii'))
+                    logger.debug(f"Encoded page {idx + 1}/{page_count}")
 
             return base64_images
         except Exception as e:
-            logger.error(f"Failed to convert PDF {pdf_path}: {str(e)}")
+            logger.error(f"Failed to convert PDF: {str(e)}")
             raise
 
-    def extract_universal_data(self, file_path: str, document_type: Optional[str] = None) -> Dict:
+    def extract_universal_data(
+        self,
+        file_path: str,
+        document_type: Optional[str] = None,
+        image_url: Optional[str] = None,
+        file_hash: Optional[str] = None
+    ) -> Dict:
         """
         Universal document extraction - analyzes ANY document and extracts ALL information.
 
@@ -115,6 +197,11 @@ class OpenAIExtractionService:
         Args:
             file_path: Path to document file (PDF, image, etc.)
             document_type: Optional hint about document type (invoice, receipt, etc.)
+            image_url: URL OpenAI can fetch the image from (e.g. a presigned
+                object storage URL). When given, the file is not read or
+                encoded locally.
+            file_hash: Content hash of the file if already known (e.g.
+                Document.file_hash); the mapped file is hashed otherwise
 
         Returns:
             Dictionary containing:
@@ -134,29 +221,51 @@ class OpenAIExtractionService:
             mime_type = mimetypes.guess_type(file_path)[0]
             logger.info(f"File type: {file_ext}, MIME: {mime_type}")
 
-            # Convert document to images
-            base64_images = self._prepare_document_images(file_path, file_ext)
-
-            if not base64_images:
+            cache_key = None
+            if image_url:
+                # OpenAI downloads the image itself
+                image_urls = [image_url]
+            else:
+                # Map the file once: the cache key hash, the base64 encoding and
+                # PDF rendering all read from the same pages without copies
+                with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as file_bytes:
+                    # Re-uploads and retries of the same file skip the API entirely
+                    if self.cache_timeout:
+                        cache_key = f"openai_extract:{file_hash or content_hash(file_bytes)}:{self.model}:{self.image_detail}:{document_type or '*'}"
+                        cached = cache.get(cache_key)
+                        if cached is not None:
+                            logger.info(f"Using cached extraction for {file_path}")
+                            return cached
+
+                    # Convert document to images
+                    base64_images = self._prepare_document_images(file_bytes, file_ext)
+
+                image_urls = [f"data:image/png;base64,{base64_image}" for base64_image in base64_images]
+
+            if not image_urls:
                 raise ValueError("No images could be extracted from document")
 
-            logger.info(f"Prepared {len(base64_images)} image(s) for analysis")
+            logger.info(f"Prepared {len(image_urls)} image(s) for analysis")
 
             # Extract data from all pages
             all_extracted_data = []
-            for page_num, base64_image in enumerate(base64_images, 1):
-                logger.info(f"Analyzing page {page_num}/{len(base64_images)}")
+            for page_num, page_image_url in enumerate(image_urls, 1):
+                logger.info(f"Analyzing page {page_num}/{len(image_urls)}")
                 page_data = self._extract_from_image(
-                    base64_image,
+                    page_image_url,
                     document_type,
                     page_num,
-                    len(base64_images)
+                    len(image_urls)
                 )
                 all_extracted_data.append(page_data)
 
             # Merge multi-page data
             final_data = self._merge_page_data(all_extracted_data)
 
+            # Only cache complete results so failed pages are retried next time
+            if cache_key and not any('error' in page_data for page_data in all_extracted_data):
+                cache.set(cache_key, final_data, self.cache_timeout)
+
             logger.info("Universal extraction completed successfully")
             return final_data
 
@@ -164,12 +273,12 @@ class OpenAIExtractionService:
             logger.exception(f"Universal extraction failed for {file_path}: {str(e)}")
             return self._get_fallback_data(str(e))
 
-    def _prepare_document_images(self, file_path: str, file_ext: str) -> List[str]:
+    def _prepare_document_images(self, file_bytes, file_ext: str) -> List[str]:
         """
         Prepare document images for analysis based on file type.
 
         Args:
-            file_path: Path to document
+            file_bytes: Document contents (bytes or memory map)
             file_ext: File extension
 
         Returns:
@@ -177,23 +286,23 @@ class OpenAIExtractionService:
         """
         try:
             if file_ext == '.pdf':
-                return self._pdf_to_base64_images(file_path)
+                return self._pdf_to_base64_images(file_bytes)
             elif file_ext in ['.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.webp']:
-                return [self._image_to_base64(file_path)]
+                return [self._image_to_base64(file_bytes)]
             else:
                 # For unsupported formats, try to treat as image
                 logger.warning(f"Unsupported format {file_ext}, attempting as image")
-                return [self._image_to_base64(file_path)]
+                return [self._image_to_base64(file_bytes)]
         except Exception as e:
             logger.error(f"Failed to prepare images: {str(e)}")
             raise
 
-    def _extract_from_image(self, base64_image: str, document_type: Optional[str], page_num: int, total_pages: int) -> Dict:
+    def _extract_from_image(self, image_url: str, document_type: Optional[str], page_num: int, total_pages: int) -> Dict:
         """
         Extract data from a single image using GPT-4 Vision.
 
         Args:
-            base64_image: Base64 encoded image
+            image_url: Image URL (base64 data URL or a URL OpenAI can fetch)
             document_type: Optional document type hint
             page_num: Current page number
             total_pages: Total number of pages
@@ -221,30 +330,30 @@ class OpenAIExtractionService:
                         {
                             "type": "image_url",
                             "image_url": {
-                                "url": f"data:image/png;base64,{base64_image}"
+                                "url": image_url,
+                                "detail": self.image_detail
                             }
                         }
                     ]
                 }
             ]
 
-            # Call OpenAI API
+            # Call OpenAI API - the response is constrained to the extraction schema
             logger.debug(f"Sending request to OpenAI (page {page_num})")
-            response = self.client.chat.completions.create(
+            response = self.client.chat.completions.parse(
                 model=self.model,
                 messages=messages,
+                response_format=DocumentExtraction,
                 max_tokens=2000,  # Increased for comprehensive extraction
                 temperature=0.1   # Low temperature for accuracy
             )
 
-            # Extract and parse response
-            result_text = response.choices[0].message.content.strip()
-            logger.debug(f"Received response (length: {len(result_text)})")
-
-            # Parse JSON from response
-            extracted_data = self._extract_json(result_text)
+            message = response.choices[0].message
+            if message.refusal:
+                raise ValueError(f"Model refused to analyze page: {message.refusal}")
 
-            return extracted_data
+            logger.debug(f"Received structured response for page {page_num}")
+            return message.parsed.to_dict()
 
         except Exception as e:
             logger.error(f"Extraction failed for page {page_num}: {str(e)}")
@@ -262,89 +371,7 @@ class OpenAIExtractionService:
         Returns:
             System prompt string
         """
-        type_hint = f"The document is likely a {document_type}." if document_type else "Identify the document type automatically."
-
-        prompt = f"""
-            ### CONTEXT ###
-            You are an expert document analyst with the ability to extract ALL meaningful information from ANY type of document.
-            {type_hint}
-            This is page {page_num} of {total_pages}.
-
-            ### INSTRUCTION ###
-            Analyze the provided document image and extract ALL important information in a structured format.
-
-            ### EXTRACTION RULES ###
-            1. **Identify Document Type**: Determine what kind of document this is (invoice, receipt, contract, ID card, form, letter, etc.)
-            2. **Extract ALL Fields**: Find and extract every piece of meaningful information
-            3. **Be Accurate**: Extract EXACT values as they appear - do not guess or make up data
-            4. **Use Proper Formats**:
-            - Dates: YYYY-MM-DD format
-            - Numbers: Numeric values without currency symbols
-            - Currency: Separate field (USD, EUR, RWF, etc.)
-            5. **Structure Data Logically**: Group related information together
-            6. **Handle Missing Data**: Use null for fields not found in the document
-
-            ### RESPONSE FORMAT ###
-            Return a JSON object with this structure:
-            {{
-            "document_type": "Type of document (invoice, receipt, contract, id_card, form, letter, etc.)",
-            "document_title": "Document title or name if visible",
-            "document_number": "Document number/ID if present",
-            "date_issued": "Issue date in YYYY-MM-DD format or null",
-            "parties": {{
-                "issuer": {{
-                "name": "Company/person who issued the document",
-                "address": "Full address if available",
-                "contact": "Phone, email, website, etc."
-                }},
-                "recipient": {{
-                "name": "Person/company receiving the document",
-                "address": "Full address if available",
-                "contact": "Contact information"
-                }}
-            }},
-            "financial_data": {{
-                "currency": "Currency code (USD, EUR, RWF, etc.) or null",
-                "subtotal": "Subtotal amount as number or null",
-                "tax": "Tax amount as number or null",
-                "total": "Total amount as number or null",
-                "payment_method": "How payment was made or null",
-                "line_items": [
-                {{
-                    "description": "Item/service description",
-                    "quantity": "Quantity as number",
-                    "unit_price": "Price per unit",
-                    "amount": "Total for this line"
-                }}
-                ]
-            }},
-            "dates": {{
-                "issue_date": "When document was created",
-                "due_date": "Payment/action due date",
-                "valid_from": "Validity start date",
-                "valid_until": "Validity end date"
-            }},
-            "extracted_fields": {{
-                "field_name": "field_value"
-            }},
-            "text_content": "Any important text, terms, conditions, or notes",
-            "metadata": {{
-                "page_number": {page_num},
-                "total_pages": {total_pages},
-                "has_signature": "true/false",
-                "has_stamp": "true/false",
-                "language": "Detected language"
-            }}
-            }}
-
-            ### IMPORTANT ###
-            - Extract ONLY what you can see in the image
-            - Be thorough - don't miss any important information
-            - Return ONLY valid JSON - no explanations or markdown
-            - If a section doesn't apply, use null or empty object
-            - Prioritize accuracy over completeness
-        """
-        return prompt
+        return _render_universal_prompt(document_type, page_num, total_pages)
 
     def _merge_page_data(self, page_data_list: List[Dict]) -> Dict:
         """
@@ -366,36 +393,28 @@ class OpenAIExtractionService:
         try:
             logger.info(f"Merging data from {len(page_data_list)} pages")
 
-            # Start with first page as base
-            merged = page_data_list[0].copy()
-
-            # Merge subsequent pages
-            for page_data in page_data_list[1:]:
-                # Merge line items if present
-                if 'financial_data' in page_data and 'line_items' in page_data['financial_data']:
-                    if 'financial_data' not in merged:
-                        merged['financial_data'] = {}
-                    if 'line_items' not in merged['financial_data']:
-                        merged['financial_data']['line_items'] = []
-                    merged['financial_data']['line_items'].extend(
-                        page_data['financial_data']['line_items']
-                    )
-
-                # Merge extracted fields
-                if 'extracted_fields' in page_data:
-                    if 'extracted_fields' not in merged:
-                        merged['extracted_fields'] = {}
-                    merged['extracted_fields'].update(page_data['extracted_fields'])
-
-                # Concatenate text content
-                if 'text_content' in page_data and page_data['text_content']:
-                    if 'text_content' not in merged:
-                        merged['text_content'] = ""
-                    merged['text_content'] += "\n\n" + page_data['text_content']
+            # Single pass over all pages, building fresh nested structures
+            # so nothing aliases the first page's data
+            line_items = []
+            extracted_fields = {}
+            text_parts = []
+            for page_data in page_data_list:
+                line_items += (page_data.get('financial_data') or {}).get('line_items') or []
+                extracted_fields.update(page_data.get('extracted_fields') or {})
+                if page_data.get('text_content'):
+                    text_parts.append(page_data['text_content'])
+
+            first_page = page_data_list[0]
+            merged = {
+                **first_page,
+                'financial_data': {**(first_page.get('financial_data') or {}), 'line_items': line_items},
+                'extracted_fields': extracted_fields,
+                'text_content': "\n\n".join(text_parts),
+            }
 
             # Update metadata
-            if 'metadata' in merged:
-                merged['metadata']['total_pages'] = len(page_data_list)
+            if first_page.get('metadata'):
+                merged['metadata'] = {**first_page['metadata'], 'total_pages': len(page_data_list)}
 
             logger.info("Successfully merged multi-page data")
             return merged
@@ -405,45 +424,6 @@ class OpenAIExtractionService:
             # Return first page if merge fails
             return page_data_list[0]
 
-    def _extract_json(self, text: str) -> Dict:
-        """
-        Extract and parse JSON from response text.
-
-        Handles various formats including markdown code blocks.
-
-        Args:
-            text: Response text that may contain JSON
-
-        Returns:
-            Parsed JSON dictionary
-
-        Raises:
-            json.JSONDecodeError: If JSON parsing fails
-        """
-        try:
-            # Remove markdown code blocks if present
-            cleaned_text = text.replace('```json', '').replace('```', '').strip()
-
-            # Try to find JSON object in text
-            start = cleaned_text.find('{')
-            end = cleaned_text.rfind('}') + 1
-
-            if start != -1 and end > start:
-                json_str = cleaned_text[start:end]
-                parsed = json.loads(json_str)
-                logger.debug("Successfully parsed JSON response")
-                return parsed
-            else:
-                # If no braces found, try parsing the whole text
-                parsed = json.loads(cleaned_text)
-                logger.debug("Successfully parsed JSON response (full text)")
-                return parsed
-
-        except json.JSONDecodeError as e:
-            logger.error(f"JSON parsing failed: {str(e)}")
-            logger.debug(f"Problematic text: {text[:500]}")
-            raise
-
     def _get_fallback_data(self, error_message: str) -> Dict:
         """
         Return fallback data structure when extraction fails.
@@ -0,0 +1,63 @@
+"""
+PDF rasterization helpers built on PyMuPDF.
+
+Renders PDF pages in-process instead of shelling out to poppler.
+"""
+from typing import Optional
+
+import fitz  # PyMuPDF
+from PIL import Image
+
+
+def pixmap_to_image(pixmap: fitz.Pixmap) -> Image.Image:
+    """
+    Convert a PyMuPDF pixmap to a PIL image.
+
+    Args:
+        pixmap: Rendered page pixmap (RGB, no alpha)
+
+    Returns:
+        PIL Image sharing the pixmap's pixel data
+    """
+    return Image.frombytes("RGB", (pixmap.width, pixmap.height), pixmap.samples)
+
+
+def render_pdf_page(doc: fitz.Document, page_num: int, dpi: int = 300) -> Image.Image:
+    """
+    Render a single page of an open PDF document to a PIL image.
+
+    Args:
+        doc: Open PyMuPDF document
+        page_num: Zero-based page index
+        dpi: Rendering resolution
+
+    Returns:
+        PIL image of the page
+    """
+    return pixmap_to_image(doc[page_num].get_pixmap(dpi=dpi, alpha=False))
+
+
+def render_pdf_page_png(doc: fitz.Document, page_num: int, dpi: int = 300, max_dimension: Optional[int] = None) -> bytes:
+    """
+    Render a single page straight to PNG bytes with MuPDF's encoder.
+
+    The page is rendered at the target size rather than downscaled
+    afterwards, and PIL is not involved at all.
+
+    Args:
+        doc: Open PyMuPDF document
+        page_num: Zero-based page index
+        dpi: Maximum rendering resolution
+        max_dimension: Cap on the longest edge in pixels (optional)
+
+    Returns:
+        PNG encoded page image
+    """
+    page = doc[page_num]
+    zoom = dpi / 72
+    if max_dimension:
+        longest_edge = max(page.rect.width, page.rect.height)
+        zoom = min(zoom, max_dimension / longest_edge)
+
+    pixmap = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+    return pixmap.tobytes("png")
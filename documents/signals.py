@@ -0,0 +1,29 @@
+"""
+Signal handlers for the documents app.
+"""
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from utils.paginations import invalidate_cached_counts
+
+from .models import Document, ExtractedData
+
+
+def results_cache_key(job_id) -> str:
+    """Cache key of the results response for an extraction job."""
+    return f"exjob:results:{job_id}"
+
+
+@receiver(post_save, sender=ExtractedData)
+@receiver(post_delete, sender=ExtractedData)
+def invalidate_cached_results(sender, instance, **kwargs):
+    """Drop the cached results response when extracted data changes."""
+    cache.delete(results_cache_key(instance.extraction_job_id))
+
+
+@receiver(post_save, sender=Document)
+@receiver(post_delete, sender=Document)
+def invalidate_cached_document_counts(sender, instance, **kwargs):
+    """Drop the owner's cached document list counts when a document changes."""
+    invalidate_cached_counts(instance.user_id)
@@ -5,16 +5,108 @@ This module handles background processing of documents using either:
 1. OpenAI Vision (universal extraction for ANY document type)
 2. Local OCR + Ollama (fallback method)
 """
-from celery import shared_task
+import logging
+import os
+
+# Tesseract spawns one OpenMP thread per core by default, which thrashes
+# when several Celery worker processes OCR at the same time.
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+from celery import chord, group, shared_task
+from celery.signals import worker_process_init
+from django.db import IntegrityError, transaction
+from django.db.models import F
 from django.utils import timezone
 from django.conf import settings
 
-from .models import ExtractionJob, ExtractedData, ProcessingStatus
-from .services import OCRService, AIExtractionService
+from .models import Document, ExtractionJob, ExtractedData, ProcessingStatus
+from .services import OCRService, AIExtractionService, OpenAIExtractionService
+from .services.hashing import file_content_hash
+from .services.ocr_service import count_pages_needing_ocr, extract_text_layer
 from utils import loggings
 
 logger = loggings.setup_logging()
 
+SEPARATOR = "=" * 100
+
+# Lifetime in seconds of object storage URLs handed to OpenAI
+PRESIGNED_URL_EXPIRY = 10 * 60
+
+
+# Columns the tasks read from a job, its document and owner; the rest
+# (error messages, descriptions, the whole user row) is never loaded
+JOB_FIELDS = (
+    'id', 'status', 'started_at',
+    'document__original_filename', 'document__file', 'document__file_format',
+    'document__document_type', 'document__file_hash', 'document__user__email',
+)
+
+# Services built once per worker process by init_worker_process
+_worker_services = {}
+
+
+@worker_process_init.connect
+def init_worker_process(**kwargs):
+    """
+    Prepare every forked worker process.
+
+    Keeps Tesseract single-threaded and builds the extraction services
+    once, so the OCR engine and HTTP connection pools are reused across
+    tasks instead of being set up for every document.
+    """
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+    _worker_services['ocr'] = _build_ocr_service()
+    _worker_services['ai'] = _build_ai_service()
+    if settings.USE_OPENAI and settings.OPENAI_API_KEY:
+        _worker_services['openai'] = _build_openai_service()
+
+
+def _build_ocr_service() -> OCRService:
+    """Build the Tesseract OCR service from settings."""
+    logger.info("Initializing OCR service...")
+    return OCRService(
+        tesseract_cmd=settings.TESSERACT_CMD,
+        preprocess_images=settings.OCR_PREPROCESS_IMAGES,
+        cache_timeout=settings.CACHE_TIMEOUT
+    )
+
+
+def _build_ai_service() -> AIExtractionService:
+    """Build the Ollama extraction service from settings."""
+    logger.info("Initializing Ollama AI service...")
+    return AIExtractionService(
+        base_url=settings.OLLAMA_BASE_URL,
+        model=settings.OLLAMA_MODEL,
+        cache_timeout=settings.EXTRACTION_CACHE_TIMEOUT
+    )
+
+
+def _build_openai_service() -> OpenAIExtractionService:
+    """Build the OpenAI Vision extraction service from settings."""
+    logger.info("Initializing OpenAI service (model: %s)", settings.OPENAI_MODEL)
+    return OpenAIExtractionService(
+        api_key=settings.OPENAI_API_KEY,
+        model=settings.OPENAI_MODEL,
+        image_detail=settings.OPENAI_IMAGE_DETAIL,
+        cache_timeout=settings.EXTRACTION_CACHE_TIMEOUT
+    )
+
+
+def get_ocr_service() -> OCRService:
+    """Return the worker's OCR service, or a new one outside a worker."""
+    return _worker_services.get('ocr') or _build_ocr_service()
+
+
+def get_ai_service() -> AIExtractionService:
+    """Return the worker's Ollama service, or a new one outside a worker."""
+    return _worker_services.get('ai') or _build_ai_service()
+
+
+def get_openai_service() -> OpenAIExtractionService:
+    """Return the worker's OpenAI service, or a new one outside a worker."""
+    return _worker_services.get('openai') or _build_openai_service()
+
 
 @shared_task(bind=True, max_retries=3)
 def process_document_task(self, job_id: str):
@@ -33,77 +125,125 @@ def process_document_task(self, job_id: str):
 
     Returns:
         Dictionary with processing results including:
-            - status: 'success' or 'error'
+            - status: 'success', 'error', 'processing' when the pages of
+              a scanned PDF were handed off to ocr_page_task subtasks, or
+              'skipped' when a retry finds another active job for the document
             - job_id: Job identifier
             - confidence: Extraction confidence score
             - processing_time: Time taken in seconds
     """
     try:
-        logger.info("="  * 100)
-        logger.info(f"DOCUMENT PROCESSING TASK STARTED - Job ID: {job_id}")
-        logger.info("=" * 100)
+        logger.info(SEPARATOR)
+        logger.info("DOCUMENT PROCESSING TASK STARTED - Job ID: %s", job_id)
+        logger.info(SEPARATOR)
+
+        # Mark the job as processing in one UPDATE before loading it. Like
+        # completed_at, started_at comes from the worker's clock: mixing in the
+        # database clock could put completed_at before started_at
+        try:
+            with transaction.atomic():
+                ExtractionJob.objects.filter(id=job_id).update(
+                    status=ProcessingStatus.PROCESSING, started_at=timezone.now()
+                )
+        except IntegrityError:
+            # A retry of a failed job, but a newer job for the same document
+            # is already active (one_active_job_per_doc) - leave it to that one
+            logger.warning("Job %s not retried: its document has another active job", job_id)
+            return {
+                'status': 'skipped',
+                'job_id': str(job_id),
+                'message': 'Document has another active extraction job'
+            }
 
         # Get the extraction job
         try:
-            job = ExtractionJob.objects.select_related('document').get(id=job_id)
-            logger.info(f"Job found: {job.id}")
-            logger.info(f"Document: {job.document.original_filename}")
-            logger.info(f"User: {job.document.user.email}")
+            job = ExtractionJob.objects.select_related('document__user').only(*JOB_FIELDS).get(id=job_id)
+            logger.info("Job found: %s", job.id)
+            logger.info("Document: %s", job.document.original_filename)
+            logger.info("User: %s", job.document.user.email)
         except ExtractionJob.DoesNotExist:
-            logger.error(f"ExtractionJob {job_id} not found in database")
+            logger.error("ExtractionJob %s not found in database", job_id)
             return {'status': 'error', 'message': 'Job not found'}
 
-        # Update job status to processing
-        job.status = ProcessingStatus.PROCESSING
-        job.started_at = timezone.now()
-        job.save(update_fields=['status', 'started_at'])
-        logger.info(f"Job status updated to PROCESSING at {job.started_at}")
+        logger.info("Job status updated to PROCESSING at %s", job.started_at)
+
+        # Check if OpenAI is enabled
+        use_openai = settings.USE_OPENAI and settings.OPENAI_API_KEY
+        logger.info("OpenAI Enabled: %s", use_openai)
 
         # Get document details
         document_type = job.document.document_type
-        file_path = job.document.file.path
         file_format = job.document.file_format
 
-        logger.info(f"Document Type: {document_type}")
-        logger.info(f"File Format: {file_format}")
-        logger.info(f"File Path: {file_path}")
-
-        # Check if OpenAI is enabled
-        use_openai = settings.USE_OPENAI and settings.OPENAI_API_KEY
-        logger.info(f"OpenAI Enabled: {use_openai}")
+        # Images on storages without local files (e.g. S3) are fetched by
+        # OpenAI from a presigned URL; everything else is read from disk
+        image_url = get_remote_image_url(job.document) if use_openai else None
+        file_path = None if image_url else job.document.file.path
+
+        # Cache keys use the content hash recorded at upload; documents
+        # uploaded before it was recorded are hashed here, once per task
+        file_hash = job.document.file_hash
+        if not file_hash and file_path:
+            file_hash = file_content_hash(file_path)
+
+        logger.info("Document Type: %s", document_type)
+        logger.info("File Format: %s", file_format)
+        logger.info("File Path: %s", file_path)
+
+        # Identical bytes were extracted before - reuse that result
+        prior = find_prior_extraction(job)
+        if prior:
+            logger.info("Reusing extraction %s of an identical file", prior.id)
+            return save_extraction_results(
+                job,
+                prior.data,
+                f"{prior.extraction_method.removesuffix('+cached')}+cached",
+                prior.overall_confidence,
+                prior.field_confidence
+            )
 
         extraction_successful = False
         structured_data = {}
         extraction_method = 'unknown'
         confidence = 0.0
+        field_confidence = {}
+
+        # Digital PDFs already carry their text - skip Vision and OCR entirely
+        if settings.SKIP_OCR_IF_TEXT_LAYER and file_format == 'pdf':
+            try:
+                text_layer = extract_text_layer(file_path)
+                if text_layer:
+                    logger.info("PDF has a usable text layer, skipping Vision and OCR")
+                    structured_data, confidence, field_confidence = extract_with_ollama(
+                        text_layer, document_type, file_format, extraction_method='pdf_text+ollama'
+                    )
+                    extraction_method = 'pdf_text+ollama'
+                    extraction_successful = True
+            except Exception as e:
+                logger.error("Text layer extraction failed: %s", e)
+                logger.info("Continuing with the regular extraction pipeline...")
 
         # OpenAI Vision (Universal Extraction) - Works with ANY document!
-        if use_openai:
+        if use_openai and not extraction_successful:
             try:
-                logger.info("=" * 100)
+                logger.info(SEPARATOR)
                 logger.info("ATTEMPTING UNIVERSAL EXTRACTION WITH OPENAI VISION")
-                logger.info("=" * 100)
+                logger.info(SEPARATOR)
 
-                # Import OpenAI service
-                from .services import OpenAIExtractionService
-
-                # Initialize OpenAI service
-                logger.info(f"Initializing OpenAI service (model: {settings.OPENAI_MODEL})")
-                openai_service = OpenAIExtractionService(
-                    api_key=settings.OPENAI_API_KEY,
-                    model=settings.OPENAI_MODEL
-                )
+                openai_service = get_openai_service()
 
                 # Universal extraction - analyzes ANY document type automatically
                 logger.info("Starting universal document analysis...")
                 structured_data = openai_service.extract_universal_data(
-                    file_path=file_path,
-                    document_type=document_type  # Optional hint
+                    file_path=file_path or job.document.file.name,
+                    document_type=document_type,  # Optional hint
+                    image_url=image_url,
+                    file_hash=file_hash
                 )
 
                 logger.info("Universal extraction completed")
-                logger.info(f"Extracted data contains {len(structured_data)} top-level keys")
-                logger.debug(f"Keys: {list(structured_data.keys())}")
+                logger.info("Extracted data contains %s top-level keys", len(structured_data))
+                logger.debug("Keys: %s", list(structured_data.keys()))
 
                 # Check if extraction was successful
                 if structured_data.get('extraction_status') != 'failed':
@@ -125,107 +265,360 @@ def process_document_task(self, job_id: str):
                     })
 
                     # Calculate confidence
-                    confidence = calculate_confidence(structured_data, "")
+                    confidence, field_confidence = score_extraction(structured_data, "")
                     extraction_successful = True
 
-                    logger.info("=" * 100)
+                    logger.info(SEPARATOR)
                     logger.info("✓ OPENAI VISION EXTRACTION SUCCESSFUL")
-                    logger.info(f"✓ Detected Document Type: {structured_data.get('document_type', 'unknown')}")
-                    logger.info(f"✓ Extraction Confidence: {confidence * 100}%")
-                    logger.info(f"✓ Method: {extraction_method}")
-                    logger.info("=" * 100)
+                    logger.info("✓ Detected Document Type: %s", structured_data.get('document_type', 'unknown'))
+                    logger.info("✓ Extraction Confidence: %s%%", confidence * 100)
+                    logger.info("✓ Method: %s", extraction_method)
+                    logger.info(SEPARATOR)
                 else:
                     error_msg = structured_data.get('error', 'Unknown error')
-                    logger.warning("=" * 100)
+                    logger.warning(SEPARATOR)
                     logger.warning("⚠ OpenAI returned failed status")
-                    logger.warning(f"⚠ Error: {error_msg}")
+                    logger.warning("⚠ Error: %s", error_msg)
                     logger.warning("⚠ Falling back to local OCR + Ollama processing")
-                    logger.warning("=" * 100)
+                    logger.warning(SEPARATOR)
 
             except Exception as e:
-                logger.error("=" * 100)
+                logger.error(SEPARATOR)
                 logger.error("✗ OPENAI VISION EXTRACTION FAILED")
-                logger.error(f"✗ Error Type: {type(e).__name__}")
-                logger.error(f"✗ Error Message: {str(e)}")
-                logger.error("=" * 100)
+                logger.error("✗ Error Type: %s", type(e).__name__)
+                logger.error("✗ Error Message: %s", e)
+                logger.error(SEPARATOR)
                 logger.exception("Full error traceback:")
                 logger.info("Falling back to local OCR + Ollama processing...")
 
         # Local OCR + Ollama (Fallback or Primary Method)
         if not extraction_successful:
-            logger.info("=" * 100)
+            logger.info(SEPARATOR)
             logger.info("STARTING LOCAL EXTRACTION (OCR + OLLAMA)")
-            logger.info("=" * 100)
+            logger.info(SEPARATOR)
 
             try:
-                # Initialize services
-                logger.info("Initializing OCR service...")
-                ocr_service = OCRService(tesseract_cmd=settings.TESSERACT_CMD)
-
-                logger.info("Initializing Ollama AI service...")
-                ai_service = AIExtractionService(
-                    base_url=settings.OLLAMA_BASE_URL,
-                    model=settings.OLLAMA_MODEL
-                )
+                if file_path is None:
+                    raise ValueError("Local OCR needs the file on local storage, it is only reachable by URL")
+
+                ocr_service = get_ocr_service()
+
+                # Scanned multi-page PDFs are OCR'd one page per subtask so
+                # the pages spread over all available workers
+                if file_format == 'pdf' and ocr_service.get_cached_text(file_path, file_hash) is None:
+                    page_count = count_pages_needing_ocr(file_path)
+                    if page_count > 1:
+                        logger.info("Step 1/2: Dispatching OCR for %s pages in parallel...", page_count)
+                        callback = finalize_extraction_task.s(job_id).on_error(extraction_failed_task.s(job_id))
+                        chord(
+                            ocr_page_task.s(job_id, file_path, page_index)
+                            for page_index in range(page_count)
+                        )(callback)
+
+                        return {
+                            'status': 'processing',
+                            'job_id': str(job_id),
+                            'pages': page_count
+                        }
 
                 # Step 1: Extract text using OCR
                 logger.info("Step 1/2: Extracting text with Tesseract OCR...")
-                ocr_result = ocr_service.extract_text(file_path)
-
-                extracted_text = ocr_result['text']
-                logger.info(f"✓ Extracted {len(extracted_text)} characters")
-                logger.info(f"✓ OCR Method: {ocr_result['method']}")
-                logger.info(f"✓ Pages: {ocr_result.get('pages', 1)}")
-
-                logger.info("--- OCR EXTRACTED TEXT (First 500 chars) ---")
-                logger.info(extracted_text[:500])
-                logger.info("--- END OCR TEXT ---")
-
-                if not extracted_text or len(extracted_text) < 10:
-                    raise ValueError("Insufficient text extracted from document (less than 10 characters)")
+                ocr_result = ocr_service.extract_text(file_path, file_hash=file_hash)
 
                 # Step 2: Extract structured data using Ollama AI
-                logger.info("Step 2/2: Extracting structured data with Ollama AI...")
-                structured_data = ai_service.extract_data(extracted_text, document_type)
-
-                # Add metadata
-                structured_data['_metadata'] = {
-                    'ocr_method': ocr_result['method'],
-                    'pages': ocr_result.get('pages', 1),
-                    'text_length': len(extracted_text),
-                    'document_type': document_type,
-                    'extraction_method': 'ocr+ollama',
-                    'file_format': file_format,
-                    'processing_timestamp': timezone.now().isoformat(),
-                    'processor': 'tesseract+ollama'
-                }
-
+                structured_data, confidence, field_confidence = extract_with_ollama(ocr_result, document_type, file_format)
                 extraction_method = 'ocr+ollama'
-                confidence = calculate_confidence(structured_data, extracted_text)
-
-                logger.info("=" * 100)
-                logger.info("✓ LOCAL EXTRACTION COMPLETED")
-                logger.info(f"✓ Extraction Confidence: {confidence * 100}%")
-                logger.info(f"✓ Method: {extraction_method}")
-                logger.info("=" * 100)
 
             except Exception as e:
-                logger.error("=" * 100)
+                logger.error(SEPARATOR)
                 logger.error("✗ LOCAL EXTRACTION FAILED")
-                logger.error(f"✗ Error: {str(e)}")
-                logger.error("=" * 100)
+                logger.error("✗ Error: %s", e)
+                logger.error(SEPARATOR)
                 raise  # Re-raise to trigger job failure
 
-        # Save extracted data to database
-        logger.info("Saving extracted data to database...")
+        return save_extraction_results(job, structured_data, extraction_method, confidence, field_confidence)
+
+    except Exception as e:
+        logger.error(SEPARATOR)
+        logger.error("✗✗✗ DOCUMENT PROCESSING FAILED ✗✗✗")
+        logger.error("✗ Job ID: %s", job_id)
+        logger.error("✗ Error: %s", e)
+        logger.error(SEPARATOR)
+        logger.exception("Full error traceback:")
+
+        mark_job_failed(job_id, e)
+
+        # Retry if not exceeded max retries
+        if self.request.retries < self.max_retries:
+            retry_countdown = 60 * (self.request.retries + 1)
+            logger.info("Scheduling retry %s/%s in %s seconds", self.request.retries + 1, self.max_retries, retry_countdown)
+            raise self.retry(exc=e, countdown=retry_countdown)
+
+        logger.error("Max retries (%s) exceeded. Job permanently failed.", self.max_retries)
+        return {
+            'status': 'error',
+            'job_id': str(job_id),
+            'error': str(e),
+            'retry_count': self.request.retries
+        }
+
+
+def enqueue_extraction_jobs(job_ids):
+    """
+    Queue processing for several extraction jobs at once.
+
+    The whole group is published through a single producer connection
+    instead of acquiring one per `.delay()` call, which matters when
+    many documents are submitted together.
+
+    Args:
+        job_ids: UUIDs of the ExtractionJobs to process
+
+    Returns:
+        GroupResult for the queued tasks
+    """
+    return group(process_document_task.s(str(job_id)) for job_id in job_ids).apply_async()
+
+
+@shared_task(bind=True, max_retries=3)
+def ocr_page_task(self, job_id: str, file_path: str, page_index: int):
+    """
+    OCR a single page of a scanned PDF as part of a chord.
+
+    A failing page is retried on its own; once its retries are exhausted
+    the chord's error callback marks the whole job failed.
+
+    Args:
+        job_id: UUID of the ExtractionJob (for logging)
+        file_path: Path to the PDF file
+        page_index: Zero-based page index
+
+    Returns:
+        Dictionary with the page text, page index and OCR method
+    """
+    logger.info("Job %s: OCR processing page %s", job_id, page_index + 1)
+    try:
+        return get_ocr_service().extract_text_from_pdf_page(file_path, page_index)
+    except Exception as exc:
+        logger.error("Job %s: OCR of page %s failed: %s", job_id, page_index + 1, exc)
+        raise self.retry(exc=exc, countdown=60 * (self.request.retries + 1))
+
+
+@shared_task
+def finalize_extraction_task(page_results: list, job_id: str):
+    """
+    Chord callback: combine per-page OCR text and run the AI extraction.
+
+    Args:
+        page_results: Results of every ocr_page_task in the chord
+        job_id: UUID of the ExtractionJob
+
+    Returns:
+        Dictionary with processing results (see process_document_task)
+    """
+    job = ExtractionJob.objects.select_related('document__user').only(*JOB_FIELDS).get(id=job_id)
+    document = job.document
+
+    # Chord results are not guaranteed to arrive in page order
+    page_results = sorted(page_results, key=lambda result: result['page'])
+    ocr_result = {
+        'text': '\n\n'.join(result['text'] for result in page_results).strip(),
+        'pages': len(page_results),
+        'method': 'ocr'
+    }
+    logger.info("Combined OCR text from %s pages", ocr_result['pages'])
+
+    get_ocr_service().cache_text(document.file.path, ocr_result, file_hash=document.file_hash)
+
+    structured_data, confidence, field_confidence = extract_with_ollama(
+        ocr_result, document.document_type, document.file_format
+    )
+    return save_extraction_results(job, structured_data, 'ocr+ollama', confidence, field_confidence)
+
+
+@shared_task
+def extraction_failed_task(request, exc, traceback, job_id: str):
+    """
+    Chord error callback: mark the job failed when any page or the
+    final extraction step raises.
+
+    Args:
+        request: Request of the failed task
+        exc: Exception raised
+        traceback: Formatted traceback
+        job_id: UUID of the ExtractionJob
+    """
+    logger.error("Parallel OCR extraction failed for job %s: %s", job_id, exc)
+    mark_job_failed(job_id, exc)
+
+
+@shared_task(bind=True, max_retries=3)
+def delete_file_from_storage(self, file_name: str):
+    """
+    Delete a document's file from storage after its row has been deleted.
+
+    Args:
+        file_name: Storage name of the file
+    """
+    storage = Document._meta.get_field('file').storage
+    try:
+        storage.delete(file_name)
+        logger.info("Deleted file from storage: %s", file_name)
+    except Exception as exc:
+        logger.error("Error deleting file %s from storage: %s", file_name, exc)
+        raise self.retry(exc=exc, countdown=60)
+
+
+def get_remote_image_url(document):
+    """
+    Get a short-lived URL OpenAI can download an image document from.
+
+    Only files without a local path (e.g. S3 via django-storages) get a
+    URL; files on local storage are inlined as base64 by the OpenAI service.
+
+    Args:
+        document: Document being processed
+
+    Returns:
+        Presigned URL, or None for PDFs and local storage
+    """
+    if document.file_format == 'pdf':
+        # PDFs have to be rendered to images locally first
+        return None
+
+    storage = document.file.storage
+    try:
+        storage.path(document.file.name)
+    except NotImplementedError:
+        # Remote storage - OpenAI downloads the image itself
+        return storage.url(document.file.name, expire=PRESIGNED_URL_EXPIRY)
+    return None
+
+
+def find_prior_extraction(job: ExtractionJob):
+    """
+    Find the latest extraction of the same user's document with the same contents and type.
+
+    Only the owner's documents are considered, so extracted data never
+    crosses over to another user who uploads the same file.
+
+    Args:
+        job: ExtractionJob being processed (document loaded)
+
+    Returns:
+        ExtractedData to reuse, or None
+    """
+    document = job.document
+    if not document.file_hash:
+        # Uploaded before content hashes were recorded
+        return None
+
+    return (
+        ExtractedData.objects
+        .filter(
+            extraction_job__document__user=document.user_id,
+            extraction_job__document__file_hash=document.file_hash,
+            extraction_job__document__document_type=document.document_type,
+        )
+        .exclude(extraction_job=job)
+        .only('id', 'data', 'overall_confidence', 'field_confidence', 'extraction_method')
+        .order_by('-created_at')
+        .first()
+    )
+
+
+def extract_with_ollama(
+    ocr_result: dict,
+    document_type: str,
+    file_format: str,
+    extraction_method: str = 'ocr+ollama'
+) -> tuple:
+    """
+    Extract structured data from OCR text using Ollama.
+
+    Args:
+        ocr_result: Result of OCRService.extract_text
+        document_type: Document type hint
+        file_format: Original file format
+        extraction_method: Method recorded in the metadata
+
+    Returns:
+        Tuple of (structured_data, confidence, field_confidence)
+    """
+    extracted_text = ocr_result['text']
+    logger.info("✓ Extracted %s characters", len(extracted_text))
+    logger.info("✓ OCR Method: %s", ocr_result['method'])
+    logger.info("✓ Pages: %s", ocr_result.get('pages', 1))
+
+    # Only slice and emit the OCR text preview when debug logging is on
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("--- OCR EXTRACTED TEXT (First 500 chars) ---")
+        logger.debug(extracted_text[:500])
+        logger.debug("--- END OCR TEXT ---")
+
+    if not extracted_text or len(extracted_text) < 10:
+        raise ValueError("Insufficient text extracted from document (less than 10 characters)")
+
+    ai_service = get_ai_service()
+
+    logger.info("Step 2/2: Extracting structured data with Ollama AI...")
+    structured_data = ai_service.extract_data(extracted_text, document_type)
+
+    # Add metadata
+    structured_data['_metadata'] = {
+        'ocr_method': ocr_result['method'],
+        'pages': ocr_result.get('pages', 1),
+        'text_length': len(extracted_text),
+        'document_type': document_type,
+        'extraction_method': extraction_method,
+        'file_format': file_format,
+        'processing_timestamp': timezone.now().isoformat(),
+        'processor': 'tesseract+ollama'
+    }
+
+    confidence, field_confidence = score_extraction(structured_data, extracted_text)
+
+    logger.info(SEPARATOR)
+    logger.info("✓ LOCAL EXTRACTION COMPLETED")
+    logger.info("✓ Extraction Confidence: %s%%", confidence * 100)
+    logger.info("✓ Method: %s", extraction_method)
+    logger.info(SEPARATOR)
+
+    return structured_data, confidence, field_confidence
+
+
+def save_extraction_results(
+    job: ExtractionJob,
+    structured_data: dict,
+    extraction_method: str,
+    confidence: float,
+    field_confidence: dict
+) -> dict:
+    """
+    Store extracted data and mark the job completed.
+
+    Args:
+        job: ExtractionJob being processed
+        structured_data: Extracted structured data
+        extraction_method: Method used for extraction
+        confidence: Overall confidence score
+        field_confidence: Per-field confidence scores
+
+    Returns:
+        Dictionary with processing results (see process_document_task)
+    """
+    # Save extracted data and complete the job atomically: a job is never
+    # COMPLETED without data, and a failed status update doesn't leave an
+    # orphaned ExtractedData row that would break the task's retry
+    logger.info("Saving extracted data to database...")
+    with transaction.atomic():
         extracted_data_obj = ExtractedData.objects.create(
             extraction_job=job,
             data=structured_data,
             overall_confidence=confidence,
-            field_confidence=calculate_field_confidence(structured_data),
+            field_confidence=field_confidence,
             extraction_method=extraction_method
         )
-        logger.info(f"✓ ExtractedData created with ID: {extracted_data_obj.id}")
 
         # Update job status to completed
         job.status = ProcessingStatus.COMPLETED
@@ -233,101 +626,121 @@ def process_document_task(self, job_id: str):
         job.processing_time_seconds = (job.completed_at - job.started_at).total_seconds()
         job.save(update_fields=['status', 'completed_at', 'processing_time_seconds'])
 
-        logger.info("=" * 100)
-        logger.info(f"✓✓✓ DOCUMENT PROCESSING COMPLETED SUCCESSFULLY ✓✓✓")
-        logger.info(f"✓ Job ID: {job_id}")
-        logger.info(f"✓ Processing Time: {job.processing_time_seconds:.2f} seconds")
-        logger.info(f"✓ Confidence: {confidence * 100:.1f}%")
-        logger.info(f"✓ Method: {extraction_method}")
-        logger.info("=" * 100)
+    logger.info("✓ ExtractedData created with ID: %s", extracted_data_obj.id)
 
-        return {
-            'status': 'success',
-            'job_id': str(job_id),
-            'confidence': confidence,
-            'processing_time': job.processing_time_seconds,
-            'extraction_method': extraction_method
-        }
+    logger.info(SEPARATOR)
+    logger.info("✓✓✓ DOCUMENT PROCESSING COMPLETED SUCCESSFULLY ✓✓✓")
+    logger.info("✓ Job ID: %s", job.id)
+    logger.info("✓ Processing Time: %.2f seconds", job.processing_time_seconds)
+    logger.info("✓ Confidence: %.1f%%", confidence * 100)
+    logger.info("✓ Method: %s", extraction_method)
+    logger.info(SEPARATOR)
 
-    except Exception as e:
-        logger.error("=" * 100)
-        logger.error(f"✗✗✗ DOCUMENT PROCESSING FAILED ✗✗✗")
-        logger.error(f"✗ Job ID: {job_id}")
-        logger.error(f"✗ Error: {str(e)}")
-        logger.error("=" * 100)
-        logger.exception("Full error traceback:")
+    return {
+        'status': 'success',
+        'job_id': str(job.id),
+        'confidence': confidence,
+        'processing_time': job.processing_time_seconds,
+        'extraction_method': extraction_method
+    }
 
-        # Update job status to failed
-        try:
-            job = ExtractionJob.objects.get(id=job_id)
-            job.status = ProcessingStatus.FAILED
-            job.error_message = str(e)
-            job.completed_at = timezone.now()
-            job.retry_count += 1
-            job.save(update_fields=['status', 'error_message', 'completed_at', 'retry_count'])
-            logger.info(f"Job status updated to FAILED (retry count: {job.retry_count})")
-        except Exception as save_error:
-            logger.error(f"Failed to update job status: {str(save_error)}")
 
-        # Retry if not exceeded max retries
-        if self.request.retries < self.max_retries:
-            retry_countdown = 60 * (self.request.retries + 1)
-            logger.info(f"Scheduling retry {self.request.retries + 1}/{self.max_retries} in {retry_countdown} seconds")
-            raise self.retry(exc=e, countdown=retry_countdown)
+def mark_job_failed(job_id: str, error: Exception) -> None:
+    """
+    Mark a job failed and bump its retry count.
 
-        logger.error(f"Max retries ({self.max_retries}) exceeded. Job permanently failed.")
-        return {
-            'status': 'error',
-            'job_id': str(job_id),
-            'error': str(e),
-            'retry_count': self.request.retries
-        }
+    Args:
+        job_id: UUID of the ExtractionJob
+        error: Exception that caused the failure
+    """
+    # Single UPDATE - no need to load the job, and the retry count is
+    # incremented in the database so concurrent failures are not lost
+    try:
+        updated = ExtractionJob.objects.filter(id=job_id).update(
+            status=ProcessingStatus.FAILED,
+            error_message=str(error),
+            completed_at=timezone.now(),
+            retry_count=F('retry_count') + 1
+        )
+        if updated:
+            logger.info("Job status updated to FAILED")
+        else:
+            logger.error("ExtractionJob %s not found, status not updated", job_id)
+    except Exception as save_error:
+        logger.error("Failed to update job status: %s", save_error)
 
 
-def calculate_confidence(data: dict, text: str) -> float:
-    """
-    Calculate overall confidence score for extracted data.
+# Placeholder values the AI services emit for fields they could not find
+PLACEHOLDER_VALUES = frozenset(('Unknown', 'N/A'))
+
+# Confidence of a filled field by its JSON type. Extracted data is parsed
+# JSON, so exact type lookups replace an isinstance() chain; strings and
+# objects need a look at the value and are handled separately.
+TYPE_CONFIDENCE = {
+    int: 0.95,  # Numeric values are generally reliable
+    float: 0.95,
+    bool: 0.95,
+    list: 0.85,  # Non-empty lists
+}
 
-    Analyzes data completeness and quality to determine confidence level.
+
+def score_extraction(data: dict, text: str) -> tuple:
+    """
+    Score extracted data overall and per field in a single pass.
 
     Args:
         data: Extracted structured data
         text: Original OCR text (empty string for vision-based extraction)
 
     Returns:
-        Confidence score between 0.0 and 1.0
+        Tuple of (overall confidence between 0.0 and 1.0,
+        dictionary mapping field names to confidence scores)
     """
     try:
-        # Count total and filled fields
-        total_fields = 0
+        field_confidence = {}
         filled_fields = 0
 
         for key, value in data.items():
             # Skip metadata and internal fields
-            if key.startswith('_') or key in ['extraction_status', 'error']:
+            if key.startswith('_') or key in ('extraction_status', 'error'):
                 continue
 
-            total_fields += 1
+            value_type = type(value)
 
-            # Check if field has meaningful value
-            if value and value != 'Unknown' and value != 'N/A' and value != [] and value is not None:
-                # For nested objects, check if they have content
-                if isinstance(value, dict):
-                    if any(v for v in value.values() if v):
-                        filled_fields += 1
-                else:
-                    filled_fields += 1
+            if value_type is str:
+                if value in PLACEHOLDER_VALUES or not value:
+                    field_confidence[key] = 0.30
+                    continue
+                # Longer strings are more likely to be accurate
+                score = 0.90 if len(value) > 3 else 0.80
+            elif not value:
+                # Empty values
+                field_confidence[key] = 0.30
+                continue
+            elif value_type is dict:
+                # Nested objects - check if they have content
+                if not any(value.values()):
+                    field_confidence[key] = 0.30
+                    continue
+                score = 0.85
+            else:
+                # Other filled values
+                score = TYPE_CONFIDENCE.get(value_type, 0.80)
+
+            field_confidence[key] = score
+            filled_fields += 1
 
+        total_fields = len(field_confidence)
         if total_fields == 0:
             logger.warning("No fields found for confidence calculation")
-            return 0.5  # Default confidence
+            return 0.5, field_confidence  # Default confidence
 
         # Base confidence on field completion
         base_confidence = filled_fields / total_fields
 
         # Adjust based on text length for OCR-based extraction
         if text:
-            text_factor = min(len(text) / 1000, 1.0)  # Cap at 1.0
+            text_factor = min(len(text), 1000) / 1000  # Cap at 1.0
             confidence = (base_confidence * 0.7) + (text_factor * 0.3)
         else:
             # For vision-based extraction, give higher weight to completion
@@ -336,61 +749,36 @@ def calculate_confidence(data: dict, text: str) -> float:
         # Ensure confidence is between 0 and 1
         confidence = max(0.0, min(1.0, confidence))
 
-        logger.debug(f"Confidence calculation: {filled_fields}/{total_fields} fields = {confidence:.2f}")
-        return round(confidence, 2)
+        logger.debug("Confidence calculation: %s/%s fields = %.2f", filled_fields, total_fields, confidence)
+        return round(confidence, 2), field_confidence
 
     except Exception as e:
-        logger.error(f"Error calculating confidence: {str(e)}")
-        return 0.5  # Return default confidence on error
+        logger.error("Error calculating confidence: %s", e)
+        return 0.5, {}  # Return default confidence on error
 
 
-def calculate_field_confidence(data: dict) -> dict:
+def calculate_confidence(data: dict, text: str) -> float:
     """
-    Calculate confidence scores for individual fields.
-
-    Provides granular confidence metrics for each extracted field.
+    Calculate overall confidence score for extracted data.
 
     Args:
         data: Extracted structured data
+        text: Original OCR text (empty string for vision-based extraction)
 
     Returns:
-        Dictionary mapping field names to confidence scores (0.0-1.0)
+        Confidence score between 0.0 and 1.0
     """
-    try:
-        field_confidence = {}
+    return score_extraction(data, text)[0]
 
-        for key, value in data.items():
-            # Skip metadata and internal fields
-            if key.startswith('_') or key in ['extraction_status', 'error']:
-                continue
 
-            # Assign confidence based on value type and quality
-            if value and value != 'Unknown' and value != 'N/A' and value != [] and value is not None:
-                if isinstance(value, (int, float)) and value != 0:
-                    # Numeric values are generally reliable
-                    field_confidence[key] = 0.95
-                elif isinstance(value, str) and len(value) > 3:
-                    # Longer strings are more likely to be accurate
-                    field_confidence[key] = 0.90
-                elif isinstance(value, list) and len(value) > 0:
-                    # Non-empty lists
-                    field_confidence[key] = 0.85
-                elif isinstance(value, dict):
-                    # Nested objects - check if they have content
-                    if any(v for v in value.values() if v):
-                        field_confidence[key] = 0.85
-                    else:
-                        field_confidence[key] = 0.30
-                else:
-                    # Other filled values
-                    field_confidence[key] = 0.80
-            else:
-                # Empty or unknown values
-                field_confidence[key] = 0.30
+def calculate_field_confidence(data: dict) -> dict:
+    """
+    Calculate confidence scores for individual fields.
 
-        logger.debug(f"Calculated confidence for {len(field_confidence)} fields")
-        return field_confidence
+    Args:
+        data: Extracted structured data
 
-    except Exception as e:
-        logger.error(f"Error calculating field confidence: {str(e)}")
-        return {}
+    Returns:
+        Dictionary mapping field names to confidence scores (0.0-1.0)
+    """
+    return score_extraction(data, "")[1]
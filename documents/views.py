@@ -2,24 +2,35 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
-from django.utils import timezone
-from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch
+from django.urls import reverse
 
-from .models import Document, ExtractionJob, ExtractedData, ProcessingStatus
+from .models import Document, ExtractionJob, ProcessingStatus
 from .serializers import (
     DocumentUploadSerializer,
     DocumentSerializer,
     ExtractionJobSerializer,
     ExtractionJobCreateSerializer,
-    ExtractedDataSerializer,
+    EXTRACTION_METHOD_DISPLAY,
 )
+from .signals import results_cache_key
 from utils.permissions import IsActiveAndVerified
-from utils.paginations import CustomPageNumberPagination
+from utils.paginations import CustomCursorPagination, CustomPageNumberPagination
 from utils import loggings
 
 # Initialize logger
 logger = loggings.setup_logging()
 
+# Document columns used by the document endpoints, plus the owner's email
+DOCUMENT_FIELDS = (
+    'id', 'file', 'original_filename', 'file_size', 'file_format',
+    'document_type', 'description', 'uploaded_at', 'updated_at',
+    'user__id', 'user__email',
+)
+
 
 class DocumentViewSet(viewsets.ModelViewSet):
     """
@@ -37,6 +48,9 @@ class DocumentViewSet(viewsets.ModelViewSet):
     pagination_class = CustomPageNumberPagination
     parser_classes = [MultiPartParser, FormParser]
 
+    # Document signals invalidate the owner's cached list count
+    cache_list_count = True
+
     def get_serializer_class(self):
         """Return appropriate serializer based on action."""
         if self.action == 'create':
@@ -47,7 +61,9 @@ class DocumentViewSet(viewsets.ModelViewSet):
         """
         Return documents for the current user only.
 
-        Optimizes query with select_related and prefetch_related.
+        Optimizes query with select_related and prefetch_related. Only the
+        job columns the serializer shows are prefetched, newest first, so
+        the latest job comes from the prefetch instead of a query per row.
         """
         if getattr(self, 'swagger_fake_view', False):
             return Document.objects.none()
@@ -55,9 +71,23 @@ class DocumentViewSet(viewsets.ModelViewSet):
         if not self.request.user.is_authenticated:
             return Document.objects.none()
 
-        return Document.objects.filter(
-            user=self.request.user
-        ).prefetch_related('extraction_jobs').order_by('-uploaded_at')
+        documents = Document.objects.filter(user=self.request.user)
+
+        if self.action in ('extract', 'destroy'):
+            # These actions never serialize the document, so get_object()
+            # should not pay for the owner join and the jobs prefetch (the
+            # owner id is kept for the post_delete count invalidation)
+            return documents.only('id', 'file', 'user')
+
+        jobs = ExtractionJob.objects.only(
+            'id', 'document_id', 'status', 'created_at', 'completed_at'
+        ).order_by('-created_at')
+
+        return documents.select_related('user').only(
+            *DOCUMENT_FIELDS
+        ).prefetch_related(
+            Prefetch('extraction_jobs', queryset=jobs)
+        ).order_by('-uploaded_at')
 
     def create(self, request, *args, **kwargs):
         """
@@ -68,70 +98,70 @@ class DocumentViewSet(viewsets.ModelViewSet):
         2. Save document
         3. Return document details
         """
-        logger.info(f"Document upload requested by user: {request.user.email}")
+        logger.info("Document upload requested by user: %s", request.user.email)
 
         serializer = self.get_serializer(data=request.data)
 
         if serializer.is_valid():
             try:
                 document = serializer.save()
-                logger.info(f"Document uploaded successfully: {document.id}")
-
-                # Return full document details
-                response_serializer = DocumentSerializer(
-                    document,
-                    context={'request': request}
-                )
+                logger.info("Document uploaded successfully: %s", document.id)
 
+                # The upload serializer represents the document in full
                 return Response(
                     {
                         "message": "Document uploaded successfully",
-                        "data": response_serializer.data
+                        "data": serializer.data
                     },
                     status=status.HTTP_201_CREATED
                 )
 
             except Exception as e:
-                logger.exception(f"Error uploading document: {str(e)}")
+                logger.exception("Error uploading document: %s", e)
                 return Response(
                     {"error": "Failed to upload document. Please try again."},
                     status=status.HTTP_500_INTERNAL_SERVER_ERROR
                 )
 
-        logger.warning(f"Document upload validation failed: {serializer.errors}")
+        logger.warning("Document upload validation failed: %s", serializer.errors)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def retrieve(self, request, *args, **kwargs):
         """Get details of a specific document."""
-        logger.info(f"Document details requested: {kwargs.get('pk')}")
+        logger.info("Document details requested: %s", kwargs.get('pk'))
         return super().retrieve(request, *args, **kwargs)
 
     def update(self, request, *args, **kwargs):
         """Update document metadata (not the file itself)."""
-        logger.info(f"Document update requested: {kwargs.get('pk')}")
+        logger.info("Document update requested: %s", kwargs.get('pk'))
         return super().update(request, *args, **kwargs)
 
     def destroy(self, request, *args, **kwargs):
         """Delete a document and all related data."""
         document = self.get_object()
-        logger.info(f"Document deletion requested: {document.id}")
+        document_id = document.id
+        logger.info("Document deletion requested: %s", document_id)
 
         try:
-            # Delete the file from storage
-            if document.file:
-                document.file.delete()
+            file_name = document.file.name
 
             # Delete the document (cascade will handle related objects)
             document.delete()
 
-            logger.info(f"Document deleted successfully: {document.id}")
+            # Remove the file from storage in the background once the row is
+            # gone, keeping the storage round trip off the request
+            if file_name:
+                from .tasks import delete_file_from_storage
+                transaction.on_commit(lambda: delete_file_from_storage.delay(file_name))
+
+            logger.info("Document deleted successfully: %s", document_id)
             return Response(
                 {"message": "Document deleted successfully"},
                 status=status.HTTP_200_OK
             )
 
         except Exception as e:
-            logger.exception(f"Error deleting document: {str(e)}")
+            logger.exception("Error deleting document: %s", e)
             return Response(
                 {"error": "Failed to delete document"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -145,167 +175,64 @@ class DocumentViewSet(viewsets.ModelViewSet):
         Creates a new extraction job and starts processing.
         """
         document = self.get_object()
-        logger.info(f"Extraction requested for document: {document.id}")
+        logger.info("Extraction requested for document: %s", document.id)
 
         try:
-            # Check for active jobs
-            active_job = document.extraction_jobs.filter(
-                status__in=[ProcessingStatus.PENDING, ProcessingStatus.PROCESSING]
-            ).first()
-
-            if active_job:
-                logger.warning(f"Active job already exists: {active_job.id}")
+            # Create new extraction job; the one_active_job_per_doc constraint
+            # rejects it if the document already has a pending/processing job
+            try:
+                with transaction.atomic():
+                    job = ExtractionJob.objects.create(
+                        document=document,
+                        status=ProcessingStatus.PENDING
+                    )
+            except IntegrityError:
+                active_job = document.extraction_jobs.filter(
+                    status__in=[ProcessingStatus.PENDING, ProcessingStatus.PROCESSING]
+                ).only('id', 'status').first()
+                # The job may have finished between the INSERT and this SELECT
+                job_id, job_status = (active_job.id, active_job.status) if active_job else (None, None)
+
+                logger.warning("Active job already exists: %s", job_id)
                 return Response(
                     {
                         "error": "Document already has an active extraction job",
-                        "job_id": active_job.id,
-                        "status": active_job.status
+                        "job_id": job_id,
+                        "status": job_status
                     },
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            # Create new extraction job
-            job = ExtractionJob.objects.create(
-                document=document,
-                status=ProcessingStatus.PENDING
-            )
-
-            logger.info(f"Extraction job created: {job.id}")
+            logger.info("Extraction job created: %s", job.id)
 
-            # Trigger async processing task
+            # Trigger async processing task once the job row is committed,
+            # so the worker can never look it up before it exists
             from .tasks import process_document_task
-            process_document_task.delay(str(job.id))
+            transaction.on_commit(lambda: process_document_task.delay(str(job.id)))
 
-            logger.info(f"Async processing task queued for job: {job.id}")
-
-            serializer = ExtractionJobSerializer(job)
+            logger.info("Async processing task queued for job: %s", job.id)
 
+            # The job was only just created; point clients at the status
+            # endpoint instead of serializing it in full
             return Response(
                 {
                     "message": "Extraction job created and queued for processing",
-                    "data": serializer.data
+                    "data": {
+                        "id": str(job.id),
+                        "status": job.status,
+                        "status_url": reverse('extraction-job-detail', args=[job.id]),
+                    }
                 },
-                status=status.HTTP_201_CREATED
+                status=status.HTTP_202_ACCEPTED
             )
 
         except Exception as e:
-            logger.exception(f"Error creating extraction job: {str(e)}")
+            logger.exception("Error creating extraction job: %s", e)
             return Response(
                 {"error": "Failed to create extraction job"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-    def _process_document_mock(self, job):
-        """
-        Mock document processing.
-
-        This is a placeholder that returns mock extracted data.
-        In production, this will be replaced with actual OCR/AI processing.
-        """
-        try:
-            # Update job status
-            job.status = ProcessingStatus.PROCESSING
-            job.started_at = timezone.now()
-            job.save()
-
-            logger.info(f"Processing job {job.id} (MOCK)")
-
-            # Simulate processing time
-            import time
-            time.sleep(1)
-
-            # Create mock extracted data based on document type
-            mock_data = self._generate_mock_data(job.document.document_type)
-
-            # Save extracted data
-            extracted_data = ExtractedData.objects.create(
-                extraction_job=job,
-                data=mock_data,
-                overall_confidence=0.95,
-                field_confidence={
-                    "vendor": 0.98,
-                    "total": 0.96,
-                    "date": 0.94
-                },
-                extraction_method="mock"
-            )
-
-            # Update job status
-            job.status = ProcessingStatus.COMPLETED
-            job.completed_at = timezone.now()
-            job.processing_time_seconds = (
-                job.completed_at - job.started_at
-            ).total_seconds()
-            job.save()
-
-            logger.info(f"Job {job.id} completed successfully (MOCK)")
-
-        except Exception as e:
-            logger.exception(f"Error processing job {job.id}: {str(e)}")
-            job.status = ProcessingStatus.FAILED
-            job.error_message = str(e)
-            job.completed_at = timezone.now()
-            job.save()
-
-    def _generate_mock_data(self, document_type):
-        """Generate mock extracted data based on document type."""
-        from datetime import date
-
-        mock_data_templates = {
-            "invoice": {
-                "vendor": "ACME Corporation",
-                "invoice_number": "INV-2024-001234",
-                "date": str(date.today()),
-                "due_date": str(date.today() + timedelta(days=30)),
-                "subtotal": 1250.00,
-                "tax": 125.00,
-                "total": 1375.00,
-                "currency": "USD",
-                "items": [
-                    {
-                        "description": "Professional Services",
-                        "quantity": 10,
-                        "unit_price": 100.00,
-                        "amount": 1000.00
-                    },
-                    {
-                        "description": "Consulting Fee",
-                        "quantity": 5,
-                        "unit_price": 50.00,
-                        "amount": 250.00
-                    }
-                ]
-            },
-            "receipt": {
-                "store_name": "SuperMart",
-                "date": str(date.today()),
-                "time": "14:30:00",
-                "total": 45.99,
-                "payment_method": "Credit Card",
-                "items": [
-                    {"name": "Product A", "price": 19.99},
-                    {"name": "Product B", "price": 26.00}
-                ]
-            },
-            "contract": {
-                "title": "Service Agreement",
-                "parties": ["Company A", "Company B"],
-                "start_date": str(date.today()),
-                "end_date": str(date.today() + timedelta(days=365)),
-                "value": 50000.00,
-                "key_terms": [
-                    "12-month term",
-                    "Monthly payments",
-                    "30-day notice period"
-                ]
-            }
-        }
-
-        return mock_data_templates.get(
-            document_type,
-            {"message": "Document processed", "type": document_type}
-        )
-
 
 class ExtractionJobViewSet(viewsets.ReadOnlyModelViewSet):
     """
@@ -318,7 +245,7 @@ class ExtractionJobViewSet(viewsets.ReadOnlyModelViewSet):
     """
     permission_classes = [IsActiveAndVerified]
     serializer_class = ExtractionJobSerializer
-    pagination_class = CustomPageNumberPagination
+    pagination_class = CustomCursorPagination
 
     def get_queryset(self):
         """
@@ -330,15 +257,31 @@ class ExtractionJobViewSet(viewsets.ReadOnlyModelViewSet):
         if not self.request.user.is_authenticated:
             return ExtractionJob.objects.none()
 
-        return ExtractionJob.objects.filter(
+        queryset = ExtractionJob.objects.filter(
             document__user=self.request.user
         ).select_related(
             'document', 'extracted_data'
         ).order_by('-created_at')
 
+        if self.action == 'results':
+            # Only the columns the results response is built from
+            queryset = queryset.only(
+                'id', 'status', 'document', 'document__original_filename',
+                'extracted_data__id', 'extracted_data__extraction_job',
+                'extracted_data__data', 'extracted_data__overall_confidence',
+                'extracted_data__field_confidence', 'extracted_data__extraction_method',
+                'extracted_data__created_at', 'extracted_data__updated_at',
+            )
+        else:
+            # Job responses only report whether results exist - leave the
+            # extracted JSON in the database
+            queryset = queryset.defer('extracted_data__data', 'extracted_data__field_confidence')
+
+        return queryset
+
     def retrieve(self, request, *args, **kwargs):
         """Get details of a specific extraction job."""
-        logger.info(f"Extraction job details requested: {kwargs.get('pk')}")
+        logger.info("Extraction job details requested: %s", kwargs.get('pk'))
         return super().retrieve(request, *args, **kwargs)
 
     @action(detail=True, methods=['get'])
@@ -348,8 +291,17 @@ class ExtractionJobViewSet(viewsets.ReadOnlyModelViewSet):
 
         Returns the structured extracted data if job is completed.
         """
+        # Completed results never change; serve them from the cache when the
+        # requesting user owns the job
+        cached = cache.get(results_cache_key(pk))
+        if cached is not None:
+            owner_id, payload = cached
+            if owner_id == request.user.id:
+                logger.info("Extraction results served from cache for job: %s", pk)
+                return Response(payload, status=status.HTTP_200_OK)
+
         job = self.get_object()
-        logger.info(f"Extraction results requested for job: {job.id}")
+        logger.info("Extraction results requested for job: %s", job.id)
 
         if job.status != ProcessingStatus.COMPLETED:
             return Response(
@@ -361,23 +313,39 @@ class ExtractionJobViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        try:
-            extracted_data = job.extracted_data
-            serializer = ExtractedDataSerializer(extracted_data)
-
-            return Response(
-                {
-                    "job_id": job.id,
-                    "document_id": job.document.id,
-                    "document_filename": job.document.original_filename,
-                    "extracted_data": serializer.data
-                },
-                status=status.HTTP_200_OK
-            )
-
-        except ExtractedData.DoesNotExist:
-            logger.error(f"No extracted data found for completed job: {job.id}")
+        # select_related already joined the row (or its absence)
+        extracted_data = getattr(job, 'extracted_data', None)
+        if extracted_data is None:
+            logger.error("No extracted data found for completed job: %s", job.id)
             return Response(
                 {"error": "No extracted data available"},
                 status=status.HTTP_404_NOT_FOUND
             )
+
+        # Same shape as ExtractedDataSerializer, built straight from the
+        # loaded columns
+        payload = {
+            "job_id": job.id,
+            "document_id": job.document_id,
+            "document_filename": job.document.original_filename,
+            "extracted_data": {
+                "id": str(extracted_data.id),
+                "data": extracted_data.data,
+                "overall_confidence": extracted_data.overall_confidence,
+                "confidence_percentage": extracted_data.confidence_percentage,
+                "field_confidence": extracted_data.field_confidence,
+                "extraction_method": extracted_data.extraction_method,
+                "extraction_method_display": EXTRACTION_METHOD_DISPLAY.get(
+                    extracted_data.extraction_method, extracted_data.extraction_method
+                ),
+                "created_at": extracted_data.created_at,
+                "updated_at": extracted_data.updated_at,
+            }
+        }
+        cache.set(
+            results_cache_key(job.id),
+            (request.user.id, payload),
+            settings.RESULTS_CACHE_TIMEOUT
+        )
+
+        return Response(payload, status=status.HTTP_200_OK)
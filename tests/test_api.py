@@ -2,11 +2,21 @@
 API endpoint tests for documents app.
 """
 import pytest
+from unittest.mock import patch
 from django.urls import reverse
 from rest_framework import status
 from documents.models import Document, ExtractionJob
 from utils.choices import DocumentType
 
+# Uploads here are never processed, so keep their files off disk
+pytestmark = pytest.mark.usefixtures('in_memory_storage')
+
+# Static URLs, resolved once per module
+DOCUMENT_LIST_URL = reverse('document-list')
+EXTRACTION_JOB_LIST_URL = reverse('extraction-job-list')
+REGISTER_URL = reverse('register')
+LOGIN_URL = reverse('login')
+
 
 @pytest.mark.django_db
 @pytest.mark.api
@@ -15,34 +25,44 @@ class TestDocumentAPI:
 
     def test_list_documents_unauthenticated(self, api_client):
         """Test listing documents without authentication fails."""
-        url = reverse('document-list')
+        url = DOCUMENT_LIST_URL
         response = api_client.get(url)
 
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
 
-    def test_list_documents_authenticated(self, authenticated_client, user, sample_pdf_file):
+    def test_list_documents_authenticated(self, authenticated_client, django_assert_num_queries, make_document):
         """Test listing documents with authentication."""
-        # Create a document
-        Document.objects.create(
-            user=user,
-            file=sample_pdf_file,
-            original_filename="test.pdf",
-            file_size=1024,
-            file_format="pdf",
-            document_type=DocumentType.INVOICE
-        )
-
-        url = reverse('document-list')
-        response = authenticated_client.get(url)
+        # Create documents
+        for _ in range(3):
+            make_document(document_type=DocumentType.INVOICE)
+
+        # Count, documents joined with their owner, and prefetched jobs -
+        # independent of the number of documents
+        url = DOCUMENT_LIST_URL
+        with django_assert_num_queries(3):
+            response = authenticated_client.get(url)
 
         assert response.status_code == status.HTTP_200_OK
-        # Response might be paginated or direct list
-        results = response.data.get('results', response.data)
-        assert len(results) >= 1
+        assert response.data['count'] == 3
+        assert len(response.data['data']) == 3
+
+    def test_list_count_follows_uploads_and_deletes(self, authenticated_client, make_document):
+        """Test the cached list count is refreshed when documents are added or removed."""
+        assert authenticated_client.get(DOCUMENT_LIST_URL).data['count'] == 0
+
+        documents = [make_document() for _ in range(3)]
+        response = authenticated_client.get(DOCUMENT_LIST_URL)
+        assert response.data['count'] == 3
+        assert len(response.data['data']) == 3
+
+        documents[0].delete()
+        response = authenticated_client.get(DOCUMENT_LIST_URL)
+        assert response.data['count'] == 2
+        assert len(response.data['data']) == 2
 
     def test_upload_document(self, authenticated_client, sample_pdf_file):
         """Test uploading a document."""
-        url = reverse('document-list')
+        url = DOCUMENT_LIST_URL
         data = {
             'file': sample_pdf_file,
             'document_type': DocumentType.INVOICE
@@ -58,22 +78,16 @@ class TestDocumentAPI:
 
     def test_upload_document_without_file(self, authenticated_client):
         """Test uploading without file fails."""
-        url = reverse('document-list')
+        url = DOCUMENT_LIST_URL
         data = {'document_type': DocumentType.INVOICE}
 
         response = authenticated_client.post(url, data)
 
         assert response.status_code == status.HTTP_400_BAD_REQUEST
 
-    def test_retrieve_document(self, authenticated_client, user, sample_pdf_file):
+    def test_retrieve_document(self, authenticated_client, make_document):
         """Test retrieving a specific document."""
-        document = Document.objects.create(
-            user=user,
-            file=sample_pdf_file,
-            original_filename="test.pdf",
-            file_size=1024,
-            file_format="pdf"
-        )
+        document = make_document()
 
         url = reverse('document-detail', kwargs={'pk': document.id})
         response = authenticated_client.get(url)
@@ -81,15 +95,9 @@ class TestDocumentAPI:
         assert response.status_code == status.HTTP_200_OK
         assert response.data['id'] == str(document.id)
 
-    def test_delete_document(self, authenticated_client, user, sample_pdf_file):
+    def test_delete_document(self, authenticated_client, make_document):
         """Test deleting a document."""
-        document = Document.objects.create(
-            user=user,
-            file=sample_pdf_file,
-            original_filename="test.pdf",
-            file_size=1024,
-            file_format="pdf"
-        )
+        document = make_document()
 
         url = reverse('document-detail', kwargs={'pk': document.id})
         response = authenticated_client.delete(url)
@@ -98,70 +106,21 @@ class TestDocumentAPI:
         assert response.status_code == status.HTTP_200_OK
         assert not Document.objects.filter(id=document.id).exists()
 
-    def test_user_can_only_see_own_documents(self, api_client, user, sample_pdf_file):
-        """Test users can only see their own documents."""
-        from django.contrib.auth import get_user_model
-        from rest_framework.authtoken.models import Token
-
-        User = get_user_model()
-
-        # Ensure user has no documents
-        Document.objects.filter(user=user).delete()
-
-        # Create another user
-        other_user = User.objects.create_user(
-            email="other@example.com",
-            password="OtherPass123!",
-            first_name="Other",
-            last_name="User",
-            is_active=True,
-            is_verified=True
-        )
-
-        # Create document for other user
-        Document.objects.create(
-            user=other_user,
-            file=sample_pdf_file,
-            original_filename="other.pdf",
-            file_size=1024,
-            file_format="pdf"
-        )
-
-        # Authenticate as first user
-        token, _ = Token.objects.get_or_create(user=user)
-        api_client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
-
-        url = reverse('document-list')
-        response = api_client.get(url)
-
-        assert response.status_code == status.HTTP_200_OK
-        # Response might be paginated or direct list
-        results = response.data.get('results', response.data)
-        assert len(results) == 0  # Should not see other user's documents
-
 
 @pytest.mark.django_db
 @pytest.mark.api
 class TestExtractionAPI:
     """Tests for Extraction API endpoints."""
 
-    def test_trigger_extraction(self, authenticated_client, user, sample_pdf_file):
+    def test_trigger_extraction(self, authenticated_client, make_document):
         """Test triggering document extraction."""
-        document = Document.objects.create(
-            user=user,
-            file=sample_pdf_file,
-            original_filename="test.pdf",
-            file_size=1024,
-            file_format="pdf",
-            document_type=DocumentType.INVOICE
-        )
+        document = make_document(document_type=DocumentType.INVOICE)
 
         url = reverse('document-extract', kwargs={'pk': document.id})
-        from unittest.mock import patch
         with patch('documents.tasks.process_document_task.delay') as mock_task:
             response = authenticated_client.post(url)
 
-        assert response.status_code == status.HTTP_201_CREATED
+        assert response.status_code == status.HTTP_202_ACCEPTED
         # Response is wrapped in 'data' key
         assert 'data' in response.data
         assert 'id' in response.data['data']
@@ -170,50 +129,21 @@ class TestExtractionAPI:
         job_id = response.data['data']['id']
         assert ExtractionJob.objects.filter(id=job_id).exists()
 
-    def test_list_extraction_jobs(self, authenticated_client, user, sample_pdf_file):
+    def test_list_extraction_jobs(self, authenticated_client, user, extraction_scenario, django_assert_num_queries):
         """Test listing extraction jobs."""
-        document = Document.objects.create(
-            user=user,
-            file=sample_pdf_file,
-            original_filename="test.pdf",
-            file_size=1024,
-            file_format="pdf"
-        )
-
-        # Ensure no other jobs exist
-        ExtractionJob.objects.filter(document__user=user).delete()
-
-        ExtractionJob.objects.create(document=document)
-
-        url = reverse('extraction-job-list')
-        response = authenticated_client.get(url)
+        # Jobs joined with their document and results; cursor pagination
+        # runs no COUNT(*)
+        url = EXTRACTION_JOB_LIST_URL
+        with django_assert_num_queries(1):
+            response = authenticated_client.get(url)
 
         assert response.status_code == status.HTTP_200_OK
         results = response.data.get('results', response.data)
         assert len(results) == 1
 
-    def test_get_extraction_results(self, authenticated_client, user, sample_pdf_file):
+    def test_get_extraction_results(self, authenticated_client, extraction_scenario):
         """Test getting extraction results."""
-        from documents.models import ExtractedData, ProcessingStatus
-
-        document = Document.objects.create(
-            user=user,
-            file=sample_pdf_file,
-            original_filename="test.pdf",
-            file_size=1024,
-            file_format="pdf"
-        )
-
-        job = ExtractionJob.objects.create(
-            document=document,
-            status=ProcessingStatus.COMPLETED
-        )
-
-        ExtractedData.objects.create(
-            extraction_job=job,
-            data={"total": 1000, "vendor": "ACME"},
-            overall_confidence=0.95
-        )
+        _, job, _ = extraction_scenario
 
         # The action name is 'results' on the viewset
         url = reverse('extraction-job-results', kwargs={'pk': job.id})
@@ -223,6 +153,32 @@ class TestExtractionAPI:
         assert 'extracted_data' in response.data
         assert response.data['extracted_data']['data']['total'] == 1000
 
+    def test_extraction_results_cache_refreshed_on_save(self, authenticated_client, extraction_scenario):
+        """Test cached results are dropped when the extracted data changes."""
+        _, job, extracted_data = extraction_scenario
+
+        url = reverse('extraction-job-results', kwargs={'pk': job.id})
+        assert authenticated_client.get(url).data['extracted_data']['data']['total'] == 1000
+
+        extracted_data.data = {"total": 2000}
+        extracted_data.save()
+
+        response = authenticated_client.get(url)
+        assert response.data['extracted_data']['data']['total'] == 2000
+
+    def test_cached_extraction_results_hidden_from_other_users(self, authenticated_client, extraction_scenario,
+                                                                other_user):
+        """Test results cached for the owner are not served to another user."""
+        _, job, _ = extraction_scenario
+
+        url = reverse('extraction-job-results', kwargs={'pk': job.id})
+        assert authenticated_client.get(url).status_code == status.HTTP_200_OK
+
+        authenticated_client.force_authenticate(user=other_user)
+        response = authenticated_client.get(url)
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
 
 @pytest.mark.django_db
 @pytest.mark.api
@@ -231,7 +187,7 @@ class TestAuthenticationAPI:
 
     def test_register_user(self, api_client):
         """Test user registration."""
-        url = reverse('register')
+        url = REGISTER_URL
         data = {
             'email': 'newuser@example.com',
             'password': 'NewPass123!',
@@ -249,7 +205,7 @@ class TestAuthenticationAPI:
 
     def test_login_user(self, api_client, user):
         """Test user login."""
-        url = reverse('login')
+        url = LOGIN_URL
         data = {
             'email': 'testuser@example.com',
             'password': 'TestPass123!'
@@ -262,7 +218,7 @@ class TestAuthenticationAPI:
 
     def test_login_invalid_credentials(self, api_client):
         """Test login with invalid credentials."""
-        url = reverse('login')
+        url = LOGIN_URL
         data = {
             'email': 'wrong@example.com',
             'password': 'WrongPass123!'
@@ -0,0 +1,58 @@
+"""
+Micro-benchmarks for the document upload hot path.
+
+Benchmarks run once, untimed, in regular test runs (--benchmark-disable);
+measure them with:
+
+    pytest tests/test_bench.py --benchmark-enable --benchmark-only
+"""
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIRequestFactory
+from documents.serializers import DocumentUploadSerializer
+from documents.views import DocumentViewSet
+from utils.choices import DocumentType
+
+DOCUMENT_LIST_URL = reverse('document-list')
+
+# Uploads stay in memory instead of piling up in MEDIA_ROOT over the rounds
+pytestmark = pytest.mark.usefixtures('in_memory_storage')
+
+
+@pytest.mark.django_db
+@pytest.mark.benchmark
+class TestUploadBenchmarks:
+    """Benchmarks for document upload validation and the upload endpoint."""
+
+    def test_upload_serializer_validation(self, benchmark, user, sample_pdf_file):
+        """Benchmark validating an upload."""
+        request = APIRequestFactory().post(DOCUMENT_LIST_URL)
+        request.user = user
+
+        def validate():
+            sample_pdf_file.seek(0)
+            serializer = DocumentUploadSerializer(
+                data={'file': sample_pdf_file, 'document_type': DocumentType.INVOICE},
+                context={'request': request}
+            )
+            return serializer.is_valid()
+
+        assert benchmark(validate)
+
+    def test_upload_endpoint(self, benchmark, monkeypatch, authenticated_client, sample_pdf_file):
+        """Benchmark a multipart upload through the API."""
+        # Repeated uploads would otherwise hit the burst throttle
+        monkeypatch.setattr(DocumentViewSet, 'throttle_classes', [])
+
+        def upload():
+            sample_pdf_file.seek(0)
+            return authenticated_client.post(
+                DOCUMENT_LIST_URL,
+                {'file': sample_pdf_file, 'document_type': DocumentType.INVOICE},
+                format='multipart'
+            )
+
+        response = benchmark.pedantic(upload, rounds=20)
+
+        assert response.status_code == status.HTTP_201_CREATED
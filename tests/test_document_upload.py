@@ -13,10 +13,17 @@ from django.urls import reverse
 from django.core.files.uploadedfile import SimpleUploadedFile
 from rest_framework import status
 from documents.models import Document
+from documents.serializers import DocumentUploadSerializer
 from utils.choices import DocumentType
 from io import BytesIO
 from PIL import Image
 
+# Uploads here are never processed, so keep their files off disk
+pytestmark = pytest.mark.usefixtures('in_memory_storage')
+
+# Static URLs, resolved once per module
+DOCUMENT_LIST_URL = reverse('document-list')
+
 
 @pytest.mark.django_db
 class TestDocumentUpload:
@@ -24,7 +31,7 @@ class TestDocumentUpload:
 
     def test_upload_pdf_success(self, authenticated_client, sample_pdf_file):
         """Test successful PDF upload."""
-        url = reverse('document-list')
+        url = DOCUMENT_LIST_URL
         data = {
             'file': sample_pdf_file,
             'document_type': DocumentType.INVOICE
@@ -38,7 +45,7 @@ class TestDocumentUpload:
 
     def test_upload_image_success(self, authenticated_client, sample_image_file):
         """Test successful image upload."""
-        url = reverse('document-list')
+        url = DOCUMENT_LIST_URL
         data = {
             'file': sample_image_file,
             'document_type': DocumentType.RECEIPT
@@ -50,7 +57,7 @@ class TestDocumentUpload:
 
     def test_upload_without_authentication(self, api_client, sample_pdf_file):
         """Test upload without authentication fails."""
-        url = reverse('document-list')
+        url = DOCUMENT_LIST_URL
         data = {
             'file': sample_pdf_file,
             'document_type': DocumentType.INVOICE
@@ -62,7 +69,7 @@ class TestDocumentUpload:
 
     def test_upload_without_file(self, authenticated_client):
         """Test upload without file fails."""
-        url = reverse('document-list')
+        url = DOCUMENT_LIST_URL
         data = {
             'document_type': DocumentType.INVOICE
         }
@@ -73,7 +80,7 @@ class TestDocumentUpload:
 
     def test_upload_with_description(self, authenticated_client, sample_pdf_file):
         """Test upload with description."""
-        url = reverse('document-list')
+        url = DOCUMENT_LIST_URL
         data = {
             'file': sample_pdf_file,
             'document_type': DocumentType.INVOICE,
@@ -90,26 +97,24 @@ class TestDocumentUpload:
 class TestFileValidation:
     """Test file validation rules."""
 
-    def test_file_too_large(self, authenticated_client):
+    def test_file_too_large(self):
         """Test upload of file exceeding size limit."""
-        # Create a file larger than 50MB
-        large_content = b'x' * (51 * 1024 * 1024)  # 51 MB
+        # Report a size over 50MB without allocating (and posting) 51 MB;
+        # the limit is checked against the reported size only
         large_file = SimpleUploadedFile(
             "large.pdf",
-            large_content,
+            b'x' * 1024,
             content_type="application/pdf"
         )
+        large_file.size = 51 * 1024 * 1024  # 51 MB
 
-        url = reverse('document-list')
-        data = {
+        serializer = DocumentUploadSerializer(data={
             'file': large_file,
             'document_type': DocumentType.INVOICE
-        }
-
-        response = authenticated_client.post(url, data, format='multipart')
+        })
 
-        assert response.status_code == status.HTTP_400_BAD_REQUEST
-        assert 'file' in response.data or 'error' in response.data
+        assert not serializer.is_valid()
+        assert 'file' in serializer.errors
 
     def test_file_too_small(self, authenticated_client):
         """Test upload of empty/very small file."""
@@ -119,7 +124,7 @@ class TestFileValidation:
             content_type="application/pdf"
         )
 
-        url = reverse('document-list')
+        url = DOCUMENT_LIST_URL
         data = {
             'file': small_file,
             'document_type': DocumentType.INVOICE
@@ -137,7 +142,7 @@ class TestFileValidation:
             content_type="application/x-msdownload"
         )
 
-        url = reverse('document-list')
+        url = DOCUMENT_LIST_URL
         data = {
             'file': invalid_file,
             'document_type': DocumentType.OTHER
@@ -147,129 +152,54 @@ class TestFileValidation:
 
         assert response.status_code == status.HTTP_400_BAD_REQUEST
 
-    def test_valid_file_formats(self, authenticated_client):
+    @pytest.mark.parametrize("filename,content_type", [
+        ('test.pdf', 'application/pdf'),
+        ('test.jpg', 'image/jpeg'),
+        ('test.jpeg', 'image/jpeg'),
+        ('test.png', 'image/png'),
+    ])
+    def test_valid_file_formats(self, authenticated_client, filename, content_type):
         """Test all valid file formats."""
-        valid_formats = [
-            ('test.pdf', 'application/pdf'),
-            ('test.jpg', 'image/jpeg'),
-            ('test.jpeg', 'image/jpeg'),
-            ('test.png', 'image/png'),
-        ]
-
-        url = reverse('document-list')
-
-        for filename, content_type in valid_formats:
-            test_file = SimpleUploadedFile(
-                filename,
-                b'test content here',
-                content_type=content_type
-            )
+        test_file = SimpleUploadedFile(
+            filename,
+            b'test content here',
+            content_type=content_type
+        )
 
-            data = {
-                'file': test_file,
-                'document_type': DocumentType.OTHER
-            }
+        url = DOCUMENT_LIST_URL
+        data = {
+            'file': test_file,
+            'document_type': DocumentType.OTHER
+        }
 
-            response = authenticated_client.post(url, data, format='multipart')
+        response = authenticated_client.post(url, data, format='multipart')
 
-            # Should succeed or fail for reasons other than file format
-            assert response.status_code in [
-                status.HTTP_201_CREATED,
-                status.HTTP_400_BAD_REQUEST  # Might fail for other validation reasons
-            ]
+        # Should succeed or fail for reasons other than file format
+        assert response.status_code in [
+            status.HTTP_201_CREATED,
+            status.HTTP_400_BAD_REQUEST  # Might fail for other validation reasons
+        ]
 
 
 @pytest.mark.django_db
 class TestDocumentPermissions:
     """Test document access permissions."""
 
-    def test_user_can_only_see_own_documents(self, api_client, user, sample_pdf_file):
-        """Test users can only see their own documents."""
-        from django.contrib.auth import get_user_model
-        from rest_framework.authtoken.models import Token
-
-        User = get_user_model()
+    @pytest.mark.parametrize("action", ["list", "retrieve", "delete"])
+    def test_user_cannot_reach_others_document(self, authenticated_client, other_document, action):
+        """Test users can neither see, access nor delete another user's document."""
+        if action == "list":
+            response = authenticated_client.get(DOCUMENT_LIST_URL)
 
-        # Create another user
-        other_user = User.objects.create_user(
-            email='other@example.com',
-            password='OtherPass123!',
-            is_active=True,
-            is_verified=True
-        )
-
-        # Create document for other user
-        Document.objects.create(
-            user=other_user,
-            file=sample_pdf_file,
-            original_filename='other.pdf',
-            file_size=1024,
-            file_format='pdf',
-            document_type=DocumentType.INVOICE
-        )
-
-        # Authenticate as first user
-        token, _ = Token.objects.get_or_create(user=user)
-        api_client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
-
-        url = reverse('document-list')
-        response = api_client.get(url)
-
-        assert response.status_code == status.HTTP_200_OK
-        assert len(response.data['results']) == 0  # Should not see other user's documents
-
-    def test_user_cannot_access_others_document(self, authenticated_client, user, sample_pdf_file):
-        """Test user cannot access another user's document."""
-        from django.contrib.auth import get_user_model
-
-        User = get_user_model()
-
-        # Create another user and their document
-        other_user = User.objects.create_user(
-            email='other@example.com',
-            username='otheruser',
-            password='OtherPass123!',
-            is_active=True
-        )
-
-        other_document = Document.objects.create(
-            user=other_user,
-            file=sample_pdf_file,
-            original_filename='other.pdf',
-            file_size=1024,
-            file_format='pdf'
-        )
-
-        # Try to access other user's document
-        url = reverse('document-detail', kwargs={'pk': other_document.id})
-        response = authenticated_client.get(url)
-
-        assert response.status_code == status.HTTP_404_NOT_FOUND
-
-    def test_user_cannot_delete_others_document(self, authenticated_client, sample_pdf_file):
-        """Test user cannot delete another user's document."""
-        from django.contrib.auth import get_user_model
-
-        User = get_user_model()
-
-        # Create another user and their document
-        other_user = User.objects.create_user(
-            email='other@example.com',
-            password='OtherPass123!',
-            is_active=True
-        )
-
-        other_document = Document.objects.create(
-            user=other_user,
-            file=sample_pdf_file,
-            original_filename='other.pdf',
-            file_size=1024,
-            file_format='pdf'
-        )
+            assert response.status_code == status.HTTP_200_OK
+            assert len(response.data['data']) == 0  # Should not see other user's documents
+            return
 
-        # Try to delete other user's document
         url = reverse('document-detail', kwargs={'pk': other_document.id})
-        response = authenticated_client.delete(url)
+        if action == "retrieve":
+            response = authenticated_client.get(url)
+        else:
+            response = authenticated_client.delete(url)
 
         assert response.status_code == status.HTTP_404_NOT_FOUND
         assert Document.objects.filter(id=other_document.id).exists()
@@ -281,7 +211,7 @@ class TestDocumentMetadata:
 
     def test_file_size_calculated(self, authenticated_client, sample_pdf_file):
         """Test file size is correctly calculated."""
-        url = reverse('document-list')
+        url = DOCUMENT_LIST_URL
         data = {
             'file': sample_pdf_file,
             'document_type': DocumentType.INVOICE
@@ -295,7 +225,7 @@ class TestDocumentMetadata:
 
     def test_file_format_extracted(self, authenticated_client, sample_pdf_file):
         """Test file format is correctly extracted."""
-        url = reverse('document-list')
+        url = DOCUMENT_LIST_URL
         data = {
             'file': sample_pdf_file,
             'document_type': DocumentType.INVOICE
@@ -308,7 +238,7 @@ class TestDocumentMetadata:
 
     def test_original_filename_preserved(self, authenticated_client, sample_pdf_file):
         """Test original filename is preserved."""
-        url = reverse('document-list')
+        url = DOCUMENT_LIST_URL
         data = {
             'file': sample_pdf_file,
             'document_type': DocumentType.INVOICE
@@ -1,10 +1,12 @@
-from django.test import TestCase
+import pytest
 from django.contrib.auth import get_user_model
 from authentication.serializers import UserRegistrationSerializer
 
 User = get_user_model()
 
-class EmailNormalizationTest(TestCase):
+
+@pytest.mark.django_db
+class TestEmailNormalization:
     def test_email_normalization(self):
         data = {
             "email": "Test@Example.com",
@@ -15,9 +17,9 @@ class EmailNormalizationTest(TestCase):
             "confirm_password": "StrongPassword123!"
         }
         serializer = UserRegistrationSerializer(data=data)
-        self.assertTrue(serializer.is_valid(), serializer.errors)
+        assert serializer.is_valid(), serializer.errors
         user = serializer.save()
-        self.assertEqual(user.email, "test@example.com")
+        assert user.email == "test@example.com"
 
     def test_email_uniqueness_case_insensitive(self):
         User.objects.create_user(
@@ -37,12 +39,11 @@ class EmailNormalizationTest(TestCase):
             "confirm_password": "StrongPassword123!"
         }
         serializer = UserRegistrationSerializer(data=data)
-        self.assertFalse(serializer.is_valid())
-        self.assertIn("email", serializer.errors)
+        assert not serializer.is_valid()
+        assert "email" in serializer.errors
         # Check for the error message we added
-        found_error = False
-        for error in serializer.errors["email"]:
-            if "A user with this email already exists" in str(error):
-                found_error = True
-                break
-        self.assertTrue(found_error, f"Expected error message not found in {serializer.errors['email']}")
+        found_error = any(
+            "A user with this email already exists" in str(error)
+            for error in serializer.errors["email"]
+        )
+        assert found_error, f"Expected error message not found in {serializer.errors['email']}"
@@ -2,8 +2,9 @@
 Unit tests for Document models.
 """
 import pytest
+from datetime import timedelta
 from django.contrib.auth import get_user_model
-from documents.models import Document, ExtractionJob, ExtractedData
+from documents.models import Document, ExtractedData
 from utils.choices import DocumentType, ProcessingStatus
 
 User = get_user_model()
@@ -13,16 +14,9 @@ User = get_user_model()
 class TestDocumentModel:
     """Tests for Document model."""
 
-    def test_create_document(self, user, sample_pdf_file):
+    def test_create_document(self, user, make_document):
         """Test creating a document."""
-        document = Document.objects.create(
-            user=user,
-            file=sample_pdf_file,
-            original_filename="test.pdf",
-            file_size=1024,
-            file_format="pdf",
-            document_type=DocumentType.INVOICE
-        )
+        document = make_document(document_type=DocumentType.INVOICE)
 
         assert document.id is not None
         assert document.user == user
@@ -30,48 +24,38 @@ class TestDocumentModel:
         assert document.file_size == 1024
         assert document.document_type == DocumentType.INVOICE
 
-    def test_document_str_representation(self, user, sample_pdf_file):
+    def test_document_str_representation(self, make_document):
         """Test document string representation."""
-        document = Document.objects.create(
-            user=user,
-            file=sample_pdf_file,
+        document = make_document(
             original_filename="invoice.pdf",
             file_size=2048,
-            file_format="pdf",
             document_type=DocumentType.INVOICE
         )
 
         assert str(document) == "invoice.pdf (invoice)"
 
-    def test_file_size_mb_property(self, user, sample_pdf_file):
+    def test_file_size_mb_property(self, make_document):
         """Test file_size_mb property."""
-        document = Document.objects.create(
-            user=user,
-            file=sample_pdf_file,
-            original_filename="test.pdf",
+        document = make_document(
             file_size=2097152,  # 2 MB in bytes
-            file_format="pdf"
         )
 
         assert document.file_size_mb == 2.0
 
-    def test_document_ordering(self, user, sample_pdf_file):
+    def test_document_ordering(self, user, stored_sample_pdf):
         """Test documents are ordered by upload date (newest first)."""
-        doc1 = Document.objects.create(
-            user=user,
-            file=sample_pdf_file,
-            original_filename="old.pdf",
-            file_size=1024,
-            file_format="pdf"
-        )
-
-        doc2 = Document.objects.create(
-            user=user,
-            file=sample_pdf_file,
-            original_filename="new.pdf",
-            file_size=1024,
-            file_format="pdf"
-        )
+        doc1, doc2 = Document.objects.bulk_create([
+            Document(
+                user=user,
+                file=stored_sample_pdf,
+                original_filename=filename,
+                file_size=1024,
+                file_format="pdf"
+            )
+            for filename in ("old.pdf", "new.pdf")
+        ])
+        # Both rows can be stamped within the same clock tick; make the first older
+        Document.objects.filter(pk=doc1.pk).update(uploaded_at=doc2.uploaded_at - timedelta(minutes=1))
 
         documents = Document.objects.all()
         assert documents[0] == doc2  # Newest first
@@ -82,41 +66,23 @@ class TestDocumentModel:
 class TestExtractionJobModel:
     """Tests for ExtractionJob model."""
 
-    def test_create_extraction_job(self, user, sample_pdf_file):
+    def test_create_extraction_job(self, make_document, make_job):
         """Test creating an extraction job."""
-        document = Document.objects.create(
-            user=user,
-            file=sample_pdf_file,
-            original_filename="test.pdf",
-            file_size=1024,
-            file_format="pdf"
-        )
+        document = make_document()
 
-        job = ExtractionJob.objects.create(
-            document=document,
-            status=ProcessingStatus.PENDING
-        )
+        job = make_job(document, status=ProcessingStatus.PENDING)
 
         assert job.id is not None
         assert job.document == document
         assert job.status == ProcessingStatus.PENDING
         assert job.retry_count == 0
 
-    def test_job_is_complete_property(self, user, sample_pdf_file):
+    def test_job_is_complete_property(self, make_document, make_job):
         """Test is_complete property."""
-        document = Document.objects.create(
-            user=user,
-            file=sample_pdf_file,
-            original_filename="test.pdf",
-            file_size=1024,
-            file_format="pdf"
-        )
+        document = make_document()
 
         # Pending job
-        job = ExtractionJob.objects.create(
-            document=document,
-            status=ProcessingStatus.PENDING
-        )
+        job = make_job(document, status=ProcessingStatus.PENDING)
         assert not job.is_complete
 
         # Completed job
@@ -129,20 +95,11 @@ class TestExtractionJobModel:
         job.save()
         assert job.is_complete
 
-    def test_job_str_representation(self, user, sample_pdf_file):
+    def test_job_str_representation(self, make_document, make_job):
         """Test job string representation."""
-        document = Document.objects.create(
-            user=user,
-            file=sample_pdf_file,
-            original_filename="test.pdf",
-            file_size=1024,
-            file_format="pdf"
-        )
+        document = make_document()
 
-        job = ExtractionJob.objects.create(
-            document=document,
-            status=ProcessingStatus.PROCESSING
-        )
+        job = make_job(document, status=ProcessingStatus.PROCESSING)
 
         assert "processing" in str(job).lower()
 
@@ -151,20 +108,11 @@ class TestExtractionJobModel:
 class TestExtractedDataModel:
     """Tests for ExtractedData model."""
 
-    def test_create_extracted_data(self, user, sample_pdf_file):
+    def test_create_extracted_data(self, make_document, make_job):
         """Test creating extracted data."""
-        document = Document.objects.create(
-            user=user,
-            file=sample_pdf_file,
-            original_filename="test.pdf",
-            file_size=1024,
-            file_format="pdf"
-        )
+        document = make_document()
 
-        job = ExtractionJob.objects.create(
-            document=document,
-            status=ProcessingStatus.COMPLETED
-        )
+        job = make_job(document, status=ProcessingStatus.COMPLETED)
 
         data = ExtractedData.objects.create(
             extraction_job=job,
@@ -179,20 +127,11 @@ class TestExtractedDataModel:
         assert data.data["total"] == 1000
         assert data.overall_confidence == 0.95
 
-    def test_confidence_percentage_property(self, user, sample_pdf_file):
+    def test_confidence_percentage_property(self, make_document, make_job):
         """Test confidence_percentage property."""
-        document = Document.objects.create(
-            user=user,
-            file=sample_pdf_file,
-            original_filename="test.pdf",
-            file_size=1024,
-            file_format="pdf"
-        )
+        document = make_document()
 
-        job = ExtractionJob.objects.create(
-            document=document,
-            status=ProcessingStatus.COMPLETED
-        )
+        job = make_job(document, status=ProcessingStatus.COMPLETED)
 
         data = ExtractedData.objects.create(
             extraction_job=job,
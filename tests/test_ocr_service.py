@@ -0,0 +1,147 @@
+"""
+Tests for the OCR image preprocessing.
+
+Tests:
+- Otsu threshold selection
+- Image enhancement before Tesseract
+- PDF text layer detection
+- OCR result cache keys
+"""
+import fitz
+import pytest
+from PIL import Image, ImageDraw
+from documents.services.ocr_service import (
+    OCR_HIGH_DPI,
+    OCR_MAX_IMAGE_DIMENSION,
+    OCRService,
+    extract_text_layer,
+    otsu_threshold,
+)
+
+# A4 in inches
+A4_SIZE = (8.27, 11.69)
+
+
+def render_size(dpi):
+    """Pixel size of an A4 page rendered at the given DPI."""
+    return tuple(round(inches * dpi) for inches in A4_SIZE)
+
+
+def make_pdf(path, lines):
+    """Write a one-page PDF whose text layer holds the given lines."""
+    with fitz.open() as doc:
+        doc.new_page().insert_text((72, 72), '\n'.join(lines))
+        doc.save(path)
+    return str(path)
+
+
+def make_scan(size):
+    """Gray page with dark 'text' lines, like a faint scan."""
+    image = Image.new('RGB', size, (200, 200, 200))
+    draw = ImageDraw.Draw(image)
+    for top in range(20, size[1] - 20, 40):
+        draw.rectangle((20, top, size[0] - 20, top + 10), fill=(60, 60, 60))
+    return image
+
+
+class TestOtsuThreshold:
+    """Test the threshold separating text from background."""
+
+    def test_threshold_splits_bimodal_histogram(self):
+        """Test the threshold falls between the text and background peaks."""
+        histogram = [0] * 256
+        histogram[30] = 1000
+        histogram[220] = 4000
+
+        threshold = otsu_threshold(histogram)
+
+        assert 30 <= threshold < 220
+
+    def test_single_level_histogram(self):
+        """Test a blank page has no threshold to pick."""
+        histogram = [0] * 256
+        histogram[255] = 5000
+
+        assert otsu_threshold(histogram) == 0
+
+
+class TestEnhanceImage:
+    """Test the preprocessing applied to images before OCR."""
+
+    @pytest.fixture
+    def ocr_service(self):
+        """Fixture for an OCR service without result caching."""
+        return OCRService()
+
+    def test_output_is_binarized_grayscale(self, ocr_service):
+        """Test the enhanced image is single-channel black and white."""
+        image = ocr_service._enhance_image(make_scan((200, 300)))
+
+        assert image.mode == 'L'
+        assert set(image.getdata()) == {0, 255}
+
+    def test_oversized_image_downscaled(self, ocr_service):
+        """Test large images are capped at OCR_MAX_IMAGE_DIMENSION, keeping the aspect ratio."""
+        image = ocr_service._enhance_image(Image.new('L', (2000, 8000), 255))
+
+        assert image.size == (OCR_MAX_IMAGE_DIMENSION // 4, OCR_MAX_IMAGE_DIMENSION)
+
+    def test_high_dpi_render_not_downscaled(self, ocr_service):
+        """Test an A4 page rendered at OCR_HIGH_DPI keeps its resolution."""
+        size = render_size(OCR_HIGH_DPI)
+
+        assert ocr_service._enhance_image(Image.new('L', size, 255)).size == size
+
+
+class TestExtractTextLayer:
+    """Test deciding whether a PDF's embedded text can replace OCR."""
+
+    def test_digital_pdf_text_used(self, tmp_path):
+        """Test a PDF with plenty of readable text returns it."""
+        lines = [f"Invoice line {n}: consulting services for ACME Corp" for n in range(10)]
+
+        result = extract_text_layer(make_pdf(tmp_path / "digital.pdf", lines))
+
+        assert result['method'] == 'direct'
+        assert result['pages'] == 1
+        assert "consulting services for ACME Corp" in result['text']
+
+    def test_short_text_layer_rejected(self, tmp_path):
+        """Test a PDF with only a few words (e.g. a scan with a header) needs OCR."""
+        assert extract_text_layer(make_pdf(tmp_path / "short.pdf", ["Scanned by ACME"])) is None
+
+    def test_garbled_text_layer_rejected(self, tmp_path):
+        """Test a text layer of mostly glyph codes and digits needs OCR."""
+        lines = ["0x1F 0x2A 0x3B 0x4C 12345 67890 #$%& 0x5D"] * 10
+
+        assert extract_text_layer(make_pdf(tmp_path / "garbled.pdf", lines)) is None
+
+
+class TestOCRCacheKey:
+    """Test the OCR result cache hashes each file at most once."""
+
+    @pytest.fixture
+    def hash_calls(self, monkeypatch):
+        """Fixture counting file hashes, with OCR itself stubbed out."""
+        calls = []
+        monkeypatch.setattr(
+            'documents.services.ocr_service.file_content_hash',
+            lambda file_path: calls.append(file_path) or "filehash"
+        )
+        monkeypatch.setattr(OCRService, 'extract_text_from_image', lambda self, file_path: "Invoice text")
+        return calls
+
+    def test_known_hash_not_recomputed(self, hash_calls):
+        """Test a hash recorded at upload is used for the lookup and the store."""
+        service = OCRService(cache_timeout=60)
+
+        service.extract_text("scan.png", file_hash="uploadhash")
+
+        assert hash_calls == []
+        assert service.get_cached_text("scan.png", "uploadhash")['text'] == "Invoice text"
+
+    def test_missing_hash_computed_once(self, hash_calls):
+        """Test an unknown hash is computed once for both the lookup and the store."""
+        OCRService(cache_timeout=60).extract_text("other.png")
+
+        assert hash_calls == ["other.png"]
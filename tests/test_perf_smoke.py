@@ -0,0 +1,47 @@
+"""
+Query-count smoke tests for the hot list endpoints, recorded by django-silk.
+
+Skipped unless silk is enabled:
+
+    ENABLE_SILK=1 pytest -m perf
+"""
+import pytest
+from django.conf import settings
+from django.urls import reverse
+from rest_framework import status
+
+pytestmark = [
+    pytest.mark.perf,
+    pytest.mark.django_db,
+    pytest.mark.skipif(not settings.ENABLE_SILK, reason="django-silk is not enabled (ENABLE_SILK=1)"),
+]
+
+# Static URLs, resolved once per module
+DOCUMENT_LIST_URL = reverse('document-list')
+EXTRACTION_JOB_LIST_URL = reverse('extraction-job-list')
+
+
+def recorded_query_count(path):
+    """Number of SQL queries silk recorded for the latest request to path."""
+    from silk.models import Request
+
+    return Request.objects.filter(path=path).latest('start_time').num_sql_queries
+
+
+def test_document_list_queries(authenticated_client, make_document):
+    """Test the document list query count does not grow with the page."""
+    for _ in range(5):
+        make_document()
+
+    response = authenticated_client.get(DOCUMENT_LIST_URL)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert recorded_query_count(DOCUMENT_LIST_URL) <= 3
+
+
+def test_extraction_job_list_queries(authenticated_client, extraction_scenario):
+    """Test the extraction job list runs a single query."""
+    response = authenticated_client.get(EXTRACTION_JOB_LIST_URL)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert recorded_query_count(EXTRACTION_JOB_LIST_URL) <= 1
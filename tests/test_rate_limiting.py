@@ -10,9 +10,22 @@ Tests:
 import pytest
 from django.urls import reverse
 from rest_framework import status
-from rest_framework.test import APIClient
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from collections import OrderedDict
+from utils.throttlings import BurstRateThrottle
 import time
 
+# Uploads here are never processed, so keep their files off disk
+pytestmark = pytest.mark.usefixtures('in_memory_storage')
+
+# Static URLs, resolved once per module
+REGISTER_URL = reverse('register')
+DOCUMENT_LIST_URL = reverse('document-list')
+LOGIN_URL = reverse('login')
+PASSWORD_RESET_REQUEST_URL = reverse('password-reset-request')
+
 
 @pytest.mark.django_db
 class TestRateLimiting:
@@ -20,7 +33,7 @@ class TestRateLimiting:
 
     def test_anonymous_rate_limit(self, api_client):
         """Test rate limiting for anonymous users."""
-        url = reverse('register')
+        url = REGISTER_URL
 
         # Make multiple requests rapidly
         responses = []
@@ -40,7 +53,7 @@ class TestRateLimiting:
 
     def test_authenticated_rate_limit(self, authenticated_client, sample_pdf_file):
         """Test rate limiting for authenticated users."""
-        url = reverse('document-list')
+        url = DOCUMENT_LIST_URL
 
         # Make multiple upload requests rapidly
         responses = []
@@ -59,7 +72,7 @@ class TestRateLimiting:
 
     def test_rate_limit_headers(self, api_client):
         """Test that rate limit headers are present."""
-        url = reverse('register')
+        url = REGISTER_URL
         data = {
             'email': 'test@example.com',
             'username': 'testuser',
@@ -77,7 +90,7 @@ class TestRateLimiting:
 
     def test_rate_limit_reset(self, api_client):
         """Test that rate limits reset after time period."""
-        url = reverse('register')
+        url = REGISTER_URL
 
         # Hit rate limit
         for i in range(15):
@@ -105,7 +118,7 @@ class TestBurstRateLimiting:
 
     def test_burst_limit_on_login(self, api_client, user):
         """Test burst rate limiting on login endpoint."""
-        url = reverse('login')
+        url = LOGIN_URL
 
         # Attempt multiple rapid logins
         responses = []
@@ -122,7 +135,7 @@ class TestBurstRateLimiting:
 
     def test_burst_limit_on_password_reset(self, api_client, user):
         """Test burst rate limiting on password reset."""
-        url = reverse('password-reset-request')
+        url = PASSWORD_RESET_REQUEST_URL
 
         # Attempt multiple rapid password reset requests
         responses = []
@@ -142,7 +155,7 @@ class TestSustainedRateLimiting:
 
     def test_sustained_api_usage(self, authenticated_client):
         """Test sustained API usage doesn't exceed limits."""
-        url = reverse('document-list')
+        url = DOCUMENT_LIST_URL
 
         # Make requests over time
         request_count = 0
@@ -168,20 +181,9 @@ class TestSustainedRateLimiting:
 class TestPerUserRateLimiting:
     """Test per-user rate limiting."""
 
-    def test_different_users_independent_limits(self, api_client, user):
+    def test_different_users_independent_limits(self, api_client, user, other_user):
         """Test that different users have independent rate limits."""
-        from django.contrib.auth import get_user_model
-        from rest_framework.authtoken.models import Token
-
-        User = get_user_model()
-
-        # Create second user
-        user2 = User.objects.create_user(
-            email='user2@example.com',
-            password='TestPass123!',
-            is_active=True,
-            is_verified=True
-        )
+        user2 = other_user
 
         # Get tokens
         token1, _ = Token.objects.get_or_create(user=user)
@@ -189,7 +191,7 @@ class TestPerUserRateLimiting:
 
         # User 1 hits rate limit
         api_client.credentials(HTTP_AUTHORIZATION=f'Token {token1.key}')
-        url = reverse('document-list')
+        url = DOCUMENT_LIST_URL
 
         for i in range(30):
             api_client.get(url)
@@ -208,8 +210,8 @@ class TestEndpointSpecificRateLimiting:
 
     def test_upload_endpoint_has_lower_limit(self, authenticated_client, sample_pdf_file):
         """Test that upload endpoint has stricter rate limits."""
-        upload_url = reverse('document-list')
-        list_url = reverse('document-list')
+        upload_url = DOCUMENT_LIST_URL
+        list_url = DOCUMENT_LIST_URL
 
         # Upload should have lower limit than list
         upload_responses = []
@@ -233,3 +235,44 @@ class TestEndpointSpecificRateLimiting:
 
         # This test depends on your specific rate limit configuration
         pass
+
+
+class TestTokenBucketThrottle:
+    """Test the in-process token bucket behind the burst and sustained throttles."""
+
+    def test_bucket_refills_over_time(self, monkeypatch):
+        """Test the bucket empties after its capacity and refills at the configured rate."""
+        now = [1000.0]
+        monkeypatch.setattr(BurstRateThrottle, 'timer', lambda self: now[0])
+        monkeypatch.setattr(BurstRateThrottle, '_buckets', OrderedDict())
+        request = Request(APIRequestFactory().get('/', REMOTE_ADDR='10.0.0.1'))
+
+        # Anonymous burst rate is 10/10s: ten tokens, one more per second
+        throttle = BurstRateThrottle()
+        results = [throttle.allow_request(request, None) for _ in range(11)]
+
+        assert results == [True] * 10 + [False]
+        assert throttle.wait() == pytest.approx(1.0)
+
+        now[0] += 1
+        assert BurstRateThrottle().allow_request(request, None)
+        assert not BurstRateThrottle().allow_request(request, None)
+
+    def test_least_recently_used_bucket_evicted(self, monkeypatch):
+        """Test the bucket map stays capped, evicting the least recently seen client."""
+        monkeypatch.setattr(BurstRateThrottle, 'MAX_BUCKETS', 2)
+        monkeypatch.setattr(BurstRateThrottle, '_buckets', OrderedDict())
+        factory = APIRequestFactory()
+
+        def hit(ip):
+            throttle = BurstRateThrottle()
+            throttle.allow_request(Request(factory.get('/', REMOTE_ADDR=ip)), None)
+            return throttle.key
+
+        first = hit('10.0.0.1')
+        second = hit('10.0.0.2')
+        hit('10.0.0.1')  # Refresh the first client
+        third = hit('10.0.0.3')
+
+        assert list(BurstRateThrottle._buckets) == [first, third]
+        assert second not in BurstRateThrottle._buckets
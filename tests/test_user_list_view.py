@@ -3,6 +3,7 @@ from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
 from authentication.models import Profile
 from utils import choices
 
@@ -10,44 +11,50 @@ User = get_user_model()
 
 
 class UserListViewTest(TestCase):
-    def setUp(self):
-        self.client = APIClient()
-        self.url = reverse('user-list')
-
-        # Create a super admin user
-        self.super_admin = User.objects.create_user(
-            email="admin@example.com",
-            username="admin",
-            first_name="Admin",
-            last_name="User",
-            password="AdminPassword123!",
-            role=choices.UserRole.SUPER_ADMIN,
-            is_verified=True
-        )
-
-        # Create a regular user
-        self.regular_user = User.objects.create_user(
-            email="regular@example.com",
-            username="regular",
-            first_name="Regular",
-            last_name="User",
-            password="RegularPassword123!",
-            role=choices.UserRole.TEAM_MEMBER,
-            is_verified=True
-        )
+    @classmethod
+    def setUpTestData(cls):
+        # Hash each password once and insert all rows in two queries
+        cls.admin_password = make_password("AdminPassword123!")
+
+        # Create a super admin user and a regular user
+        cls.super_admin, cls.regular_user = User.objects.bulk_create([
+            User(
+                email="admin@example.com",
+                username="admin",
+                first_name="Admin",
+                last_name="User",
+                password=cls.admin_password,
+                role=choices.UserRole.SUPER_ADMIN,
+                is_verified=True
+            ),
+            User(
+                email="regular@example.com",
+                username="regular",
+                first_name="Regular",
+                last_name="User",
+                password=make_password("RegularPassword123!"),
+                role=choices.UserRole.TEAM_MEMBER,
+                is_verified=True
+            ),
+        ])
 
         # Create profiles for users
-        Profile.objects.create(
-            user=self.super_admin,
-            bio="Super Admin Bio",
-            phone_number="+1234567890"
-        )
+        Profile.objects.bulk_create([
+            Profile(
+                user=cls.super_admin,
+                bio="Super Admin Bio",
+                phone_number="+1234567890"
+            ),
+            Profile(
+                user=cls.regular_user,
+                bio="Regular User Bio",
+                phone_number="+0987654321"
+            ),
+        ])
 
-        Profile.objects.create(
-            user=self.regular_user,
-            bio="Regular User Bio",
-            phone_number="+0987654321"
-        )
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse('user-list')
 
     def test_list_users_as_super_admin(self):
         """Test that super admin can list users"""
@@ -61,12 +68,15 @@ class UserListViewTest(TestCase):
 
     def test_list_users_as_superuser(self):
         """Test that superuser can list users"""
-        superuser = User.objects.create_superuser(
+        superuser = User.objects.create(
             email="superuser@example.com",
             username="superuser",
             first_name="Super",
             last_name="User",
-            password="SuperPassword123!"
+            password=self.admin_password,
+            is_superuser=True,
+            is_staff=True,
+            is_verified=True
         )
 
         self.client.force_authenticate(user=superuser)
@@ -1,5 +1,9 @@
+import atexit
+import functools
 import logging
+import logging.handlers
 import os
+import queue
 import sys
 from pathlib import Path
 from typing import Optional
@@ -23,6 +27,27 @@ class RelativePathFilter(logging.Filter):
         """
         super().__init__()
         self.base_path = Path(base_path or os.getcwd())
+        self._base_str = str(self.base_path)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=2048)
+    def _compute_relpath(pathname: str, base: str) -> str:
+        """
+        Compute the path of a source file relative to base, cached per file.
+
+        Args:
+            pathname (str): Absolute path of the source file.
+            base (str): Base path to calculate the relative path from.
+
+        Returns:
+            str: Relative path, or the file name for files outside base.
+        """
+        try:
+            return str(Path(pathname).relative_to(base))
+
+        except ValueError:
+            # Fallback to filename if relative path calculation fails
+            return os.path.basename(pathname)
 
     def filter(self, record: logging.LogRecord) -> bool:
         """
@@ -36,13 +61,11 @@ class RelativePathFilter(logging.Filter):
         """
         try:
             # Convert absolute path to relative path
-            abs_path = Path(record.pathname)
-            rel_path = abs_path.relative_to(self.base_path)
-            record.relpath = str(rel_path)
+            record.relpath = self._compute_relpath(record.pathname, self._base_str)
 
-        except (ValueError, AttributeError):
-            # Fallback to filename if relative path calculation fails
-            record.relpath = getattr(record, "filename", record.pathname)
+        except (TypeError, AttributeError):
+            # Fallback to filename if the record has no usable pathname
+            record.relpath = getattr(record, "filename", getattr(record, "pathname", ""))
 
         return True
 
@@ -57,6 +80,8 @@ class LoggingConfig:
 
     _instance: Optional["LoggingConfig"] = None
     _logger: Optional[logging.Logger] = None
+    _listener: Optional[logging.handlers.QueueListener] = None
+    _queue_handler: Optional[logging.handlers.QueueHandler] = None
     _is_configured: bool = False
 
     # Default configuration constants
@@ -89,6 +114,13 @@ class LoggingConfig:
             self._project_root = self._find_project_root()
             self._log_dir = self._project_root / self.DEFAULT_LOG_DIR
 
+            # Flush queued log records on interpreter shutdown
+            atexit.register(self.stop_listener)
+
+            # Forked processes (Celery prefork workers, gunicorn --preload)
+            # inherit the queue handler but not the listener thread
+            os.register_at_fork(after_in_child=self._restart_listener)
+
     def _find_project_root(self) -> Path:
         """
         Find the project root directory by looking for manage.py or settings.py.
@@ -218,6 +250,7 @@ class LoggingConfig:
 
             # Clear existing handlers if reconfiguring
             if force_reconfigure:
+                self.stop_listener()
                 logger.handlers.clear()
 
             # Check if logger already has handlers (avoid duplicate setup)
@@ -232,15 +265,21 @@ class LoggingConfig:
             # Prevent propagation to root logger to avoid duplicate messages
             logger.propagate = False
 
-            # Create and add console handler
-            console_handler = self._create_console_handler(console_level)
-            logger.addHandler(console_handler)
+            # Create console handler
+            handlers = [self._create_console_handler(console_level)]
 
-            # Create and add file handler (if successful)
+            # Create file handler (if successful)
             file_handler = self._create_file_handler(log_file, file_level)
             if file_handler:
-                logger.addHandler(file_handler)
-            else:
+                handlers.append(file_handler)
+
+            # Log calls only enqueue the record; a background listener thread
+            # formats it and does the console and file I/O
+            self._queue_handler = logging.handlers.QueueHandler(queue.SimpleQueue())
+            logger.addHandler(self._queue_handler)
+            self._start_listener(handlers)
+
+            if not file_handler:
                 logger.warning(
                     "File logging could not be configured. Only console logging is active."
                 )
@@ -254,6 +293,40 @@ class LoggingConfig:
             error_msg = f"Critical error setting up logging: {e}"
             raise RuntimeError(error_msg) from e
 
+    def _start_listener(self, handlers) -> None:
+        """
+        Start a listener thread writing the queue handler's records to handlers.
+
+        Args:
+            handlers: Console and file handlers doing the actual output.
+        """
+        self._listener = logging.handlers.QueueListener(
+            self._queue_handler.queue, *handlers, respect_handler_level=True
+        )
+        self._listener.start()
+
+    def _restart_listener(self) -> None:
+        """
+        Give a forked child process its own queue and listener thread.
+
+        Threads do not survive fork(), so without this the child's records
+        would pile up in the queue and never be written. A fresh queue also
+        drops records the parent had queued but not yet written.
+        """
+        if self._listener is None:
+            return
+
+        self._queue_handler.queue = queue.SimpleQueue()
+        self._start_listener(self._listener.handlers)
+
+    def stop_listener(self) -> None:
+        """
+        Stop the queue listener, writing out any records still queued.
+        """
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
     def get_logger(self, name: str) -> logging.Logger:
         """
         Get a logger instance with the specified name.
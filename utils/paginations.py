@@ -1,7 +1,13 @@
+import functools
+import hashlib
+import uuid
 from urllib.parse import urlparse, parse_qs, urlencode
 from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ImproperlyConfigured
-from rest_framework.pagination import PageNumberPagination
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 from rest_framework.response import Response
 from rest_framework.exceptions import ValidationError, NotFound
 
@@ -11,6 +17,63 @@ from utils.loggings import setup_logging
 logger = setup_logging()
 
 
+# Seconds to keep a list count; 0 disables caching
+COUNT_CACHE_TIMEOUT = getattr(settings, "PAGINATION_COUNT_CACHE_TIMEOUT", 30)
+
+
+def count_cache_version_key(user_id) -> str:
+    """Cache key of the version stamped into a user's cached list counts."""
+    return f"pagination_count_version:{user_id}"
+
+
+def invalidate_cached_counts(user_id) -> None:
+    """
+    Make every list count cached for a user stale.
+
+    Call whenever objects in the user's cached lists are created, changed
+    or deleted. The version only has to outlive the counts stamped with the
+    previous one, so it expires with them.
+    """
+    cache.set(count_cache_version_key(user_id), uuid.uuid4().hex, COUNT_CACHE_TIMEOUT)
+
+
+class CachedCountPaginator(Paginator):
+    """
+    Paginator that caches the total count of a queryset for a short time.
+
+    Every paginated request otherwise runs a COUNT(*) over the whole
+    filtered queryset. Counts are only cached for a user scope: the cache
+    key combines the queryset's SQL and parameters with the user's count
+    version, which invalidate_cached_counts() replaces when their objects
+    change.
+    """
+
+    count_cache_timeout = COUNT_CACHE_TIMEOUT
+
+    def __init__(self, *args, count_cache_scope=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.count_cache_scope = count_cache_scope
+
+    @cached_property
+    def count(self):
+        """Return the total number of objects, from the cache when possible."""
+        query = getattr(self.object_list, "query", None)
+        if not self.count_cache_timeout or query is None or self.count_cache_scope is None:
+            return super().count
+
+        version = cache.get(count_cache_version_key(self.count_cache_scope), "")
+        sql, params = query.sql_with_params()
+        key = "pagination_count:" + hashlib.md5(
+            f"{version}{sql}{params}".encode("utf-8"), usedforsecurity=False
+        ).hexdigest()
+
+        count = cache.get(key)
+        if count is None:
+            count = super().count
+            cache.set(key, count, self.count_cache_timeout)
+        return count
+
+
 class CustomPageNumberPagination(PageNumberPagination):
     """
     Custom pagination class that extends Django REST Framework's PageNumberPagination.
@@ -20,8 +83,14 @@ class CustomPageNumberPagination(PageNumberPagination):
     - Absolute/relative link toggle
     - Structured error handling
     - Enriched metadata (first/last/item_range/etc.)
+    - Short-lived cache of the total count, for views that set
+      `cache_list_count = True` and call invalidate_cached_counts() for the
+      owner whenever a listed object changes
     """
 
+    # Cache COUNT(*) results between page requests
+    django_paginator_class = CachedCountPaginator
+
     # Allow clients to specify page size via query parameter (e.g., ?page_size=10)
     page_size_query_param = "page_size"
     max_page_size = 100
@@ -180,6 +249,13 @@ class CustomPageNumberPagination(PageNumberPagination):
         """
         Override to gracefully handle out-of-range pages.
         """
+        # Cached counts are scoped to the requesting user's count version
+        user = getattr(request, "user", None)
+        if getattr(view, "cache_list_count", False) and getattr(user, "is_authenticated", False):
+            self.django_paginator_class = functools.partial(
+                CachedCountPaginator, count_cache_scope=user.pk
+            )
+
         try:
             return super().paginate_queryset(queryset, request, view=view)
         except NotFound:
@@ -232,3 +308,17 @@ class CustomPageNumberPagination(PageNumberPagination):
         except Exception as e:
             logger.error("Error generating paginated response: %s", str(e))
             raise
+
+
+class CustomCursorPagination(CursorPagination):
+    """
+    Cursor pagination for append-only feeds such as extraction jobs.
+
+    Pages are fetched with an indexed range scan on the ordering column and
+    no COUNT(*) is run, so listing cost doesn't grow with history. Clients
+    follow the opaque `next`/`previous` links instead of page numbers.
+    """
+
+    ordering = "-created_at"
+    page_size_query_param = "page_size"
+    max_page_size = 100
@@ -1,4 +1,6 @@
 import re
+import threading
+from collections import OrderedDict
 from django.utils.translation import gettext_lazy as _
 from rest_framework.exceptions import Throttled
 from rest_framework.throttling import UserRateThrottle
@@ -133,6 +135,73 @@ class CustomScopedRateThrottle(UserRateThrottle):
         return wait_time
 
 
+class TokenBucketRateThrottle(CustomScopedRateThrottle):
+    """
+    A scoped throttle backed by an in-process token bucket instead of the cache.
+
+    Each client gets a bucket of `num_requests` tokens that refills at
+    `num_requests` per `duration`, computed lazily when a request is checked.
+    This avoids a cache read and write (of a growing request history) per request.
+
+    Buckets live in process memory, so every worker process enforces the
+    limit on its own. Use it for coarse abuse protection such as burst and
+    sustained limits, not for security-sensitive limits like login attempts.
+    """
+
+    # Hard cap on tracked clients; the least recently seen bucket is evicted
+    # first, which at worst gives that client a fresh (full) bucket
+    MAX_BUCKETS = 10000
+
+    _buckets = OrderedDict()  # key -> (tokens, last_refill), oldest first
+    _lock = threading.Lock()
+
+    def allow_request(self, request, view):
+        """
+        Take a token from the client's bucket, refilling it first.
+        """
+        # Bypass throttling if LOAD_TESTING is enabled
+        if config("LOAD_TESTING", default=False, cast=bool):
+            return True
+
+        self.request = request  # Store for `wait()` fallback
+        self.num_requests, self.duration = self.get_rate_tuple(request)
+
+        if self.num_requests is None or self.duration is None:
+            return True  # Fail open if throttle rate misconfigured
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        capacity = self.num_requests
+        refill_rate = self.num_requests / self.duration
+        now = self.timer()
+
+        with self._lock:
+            tokens, last_refill = self._buckets.pop(self.key, (capacity, now))
+            tokens = min(capacity, tokens + (now - last_refill) * refill_rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[self.key] = (tokens, now)
+
+            while len(self._buckets) > self.MAX_BUCKETS:
+                self._buckets.popitem(last=False)
+
+        self.tokens = tokens
+        return allowed
+
+    def wait(self):
+        """
+        Returns the time (in seconds) until the bucket holds a token again.
+        """
+        if not getattr(self, "num_requests", None) or not getattr(self, "duration", None):
+            return None
+
+        refill_rate = self.num_requests / self.duration
+        return max(0, (1 - self.tokens) / refill_rate)
+
+
 class OTPRequestRateThrottle(CustomScopedRateThrottle):
     """
     Throttle class for controlling the rate of OTP requests.
@@ -272,7 +341,7 @@ class ReceiptSubmissionThrottle(CustomScopedRateThrottle):
     premium_rate = "60/1h"
 
 
-class BurstRateThrottle(CustomScopedRateThrottle):
+class BurstRateThrottle(TokenBucketRateThrottle):
     """
     Throttle class for burst protection on high-frequency endpoints.
 
@@ -289,7 +358,7 @@ class BurstRateThrottle(CustomScopedRateThrottle):
     premium_rate = "60/10s"
 
 
-class SustainedRateThrottle(CustomScopedRateThrottle):
+class SustainedRateThrottle(TokenBucketRateThrottle):
     """
     Throttle class for sustained usage over longer periods.
 
@@ -0,0 +1,19 @@
+from django.core.files.uploadhandler import (
+    MemoryFileUploadHandler,
+    TemporaryFileUploadHandler,
+)
+
+# Django reads multipart bodies in 64 KB chunks by default. Multi-megabyte
+# PDF scans are common, so read them in 1 MB chunks to cut the number of
+# socket reads and temp-file writes per upload.
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+
+class LargeChunkMemoryFileUploadHandler(MemoryFileUploadHandler):
+    """Keep small uploads in memory, reading them in 1 MB chunks."""
+    chunk_size = UPLOAD_CHUNK_SIZE
+
+
+class LargeChunkTemporaryFileUploadHandler(TemporaryFileUploadHandler):
+    """Stream large uploads to FILE_UPLOAD_TEMP_DIR in 1 MB chunks."""
+    chunk_size = UPLOAD_CHUNK_SIZE